@@ -99,7 +99,8 @@ class AnalyticsStorage:
             "titles_score": analysis.get('titles', {}).get('score', 0),
             "headings_score": analysis.get('headings', {}).get('score', 0),
             "images_score": analysis.get('images_alt', {}).get('score', 0),
-            "meta_descriptions_score": analysis.get('meta_descriptions', {}).get('score', 0)
+            "meta_descriptions_score": analysis.get('meta_descriptions', {}).get('score', 0),
+            "partial": analysis_data.get('partial', False)
         }
     
     def clear_data(self):
@@ -308,9 +308,10 @@ def perform_seo_analysis(url, storage: AnalyticsStorage):
     # Barra di progresso e messaggi di stato
     progress_bar = st.progress(0)
     status_text = st.empty()
+    analyzer = None
     
     try:
-        # Inizializza analyzer
+        # Inizializza analyzer (Chromium parte solo se una pagina richiede il render JS)
         analyzer = SEOAnalyzer()
         
         # Step 1: Connessione al sito
@@ -344,8 +345,9 @@ def perform_seo_analysis(url, storage: AnalyticsStorage):
         progress_bar.progress(100)
         time.sleep(0.5)
         
-        # Salva risultati in session state
+        # Salva risultati in session state (robots.txt e sitemap arrivano dalla cache dell'analisi)
         robots_analysis = analyzer.analyze_robots_txt(url)
+        budget_status = analyzer.budget_status()
         page_urls_from_sitemaps = analyzer.extract_urls_from_sitemaps(sitemap_urls) if sitemap_urls else []
         
         results_data = {
@@ -356,9 +358,22 @@ def perform_seo_analysis(url, storage: AnalyticsStorage):
             'sitemap_count': len(sitemap_urls),
             'sitemap_urls': sitemap_urls,
             'pages_in_sitemaps': len(page_urls_from_sitemaps),
+            'page_urls_from_sitemaps': page_urls_from_sitemaps,
             'robots_found': robots_analysis.get('found', False),
             'robots_analysis': robots_analysis,
-            'pages_data': pages_data
+            'pages_data': pages_data,
+            # tempo massimo esaurito: analisi sulle sole pagine visitate
+            'partial': budget_status['partial'],
+            'unvisited_urls': budget_status['unvisited_urls'],
+            'time_budget': budget_status,
+            'http_cache': analyzer.response_cache.stats(),
+            'http_disk_cache': analyzer.http_cache_stats(),
+            'page_store': dict(analyzer.page_store_stats),
+            'crawl': dict(analyzer.crawl_stats),
+            'politeness': analyzer.scheduler.stats(),
+            'concurrency': analyzer.concurrency.stats(),
+            'circuit_breaker': analyzer.breaker.stats(),
+            'browser': analyzer.browser_pool.stats()
         }
         
         # Salva in session state
@@ -380,6 +395,10 @@ def perform_seo_analysis(url, storage: AnalyticsStorage):
         status_text.empty()
         st.error(f"Errore durante l'analisi: {str(e)}")
         st.error("Verifica che l'URL sia corretto e che il sito sia accessibile.")
+    finally:
+        # rilascia il browser condiviso anche in caso di errore o st.rerun()
+        if analyzer is not None:
+            analyzer.close()
 
 def display_results(results, url):
     """Mostra i risultati dell'analisi SEO"""
@@ -398,6 +417,13 @@ def display_results(results, url):
     </div>
     """, unsafe_allow_html=True)
     
+    if results.get('partial'):
+        st.warning(
+            f"Analisi parziale: il tempo massimo è stato raggiunto e i risultati riguardano "
+            f"solo le {results.get('pages_count', 0)} pagine visitate "
+            f"({results.get('unvisited_urls', 0)} URL non visitati)."
+        )
+    
     # Informazioni sitemap dettagliate
     if results.get('sitemap_urls'):
         st.markdown(f"""
@@ -527,11 +553,13 @@ def display_results(results, url):
                 <h4 style="color: #1f77b4; margin-bottom: 1rem;">Pagine dalle Sitemap ({results.get('pages_in_sitemaps', 0)})</h4>
             """, unsafe_allow_html=True)
             
-            # Estrai e mostra le pagine effettive dalle sitemap
-            from seo_analyzer import SEOAnalyzer
-            analyzer = SEOAnalyzer()
+            # Pagine effettive dalle sitemap, già estratte durante l'analisi
             if results.get('sitemap_urls'):
-                page_urls = analyzer.extract_urls_from_sitemaps(results['sitemap_urls'])
+                page_urls = results.get('page_urls_from_sitemaps')
+                if page_urls is None:
+                    # risultati salvati prima di questa versione: solo HTTP, nessun browser
+                    with SEOAnalyzer() as analyzer:
+                        page_urls = analyzer.extract_urls_from_sitemaps(results['sitemap_urls'])
                 
                 if page_urls:
                     for i, page_url in enumerate(page_urls[:20], 1):  # Mostra prime 20
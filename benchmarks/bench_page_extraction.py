@@ -0,0 +1,155 @@
+"""Benchmark CPU dell'estrazione campi pagina: vecchio percorso vs PageExtractor.
+
+Vecchio percorso: parsing, secondo parsing di str(soup) per il testo pulito e una
+find_all per ogni campo. Nuovo: un parsing e una sola visita del DOM.
+Verifica anche che i due percorsi producano lo stesso dizionario.
+
+Uso:
+    python benchmarks/bench_page_extraction.py [file.html ...] [--sections N] [--runs N]
+"""
+import argparse
+import os
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from page_extractor import Bs4Backend  # noqa: E402
+from seo_analyzer import SEOAnalyzer  # noqa: E402
+
+PAGE_URL = "https://www.esempio-elementor.it/servizi/"
+
+
+def build_elementor_page(sections: int) -> str:
+    """Pagina sintetica in stile Elementor: wrapper profondi, heading, gallerie, link"""
+    parts = [
+        '<!DOCTYPE html><html lang="it"><head><meta charset="utf-8">',
+        '<title>Servizi di consulenza e sviluppo web a Volgograd</title>',
+        '<meta name="description" content="Scopri i nostri servizi di consulenza, '
+        'sviluppo web e marketing digitale per aziende e professionisti.">',
+        '<meta name="viewport" content="width=device-width, initial-scale=1">',
+        '<meta property="og:title" content="Servizi - Esempio">',
+        '<meta property="og:url" content="https://www.esempio-elementor.it/servizi/">',
+        '<meta name="twitter:card" content="summary_large_image">',
+        '<link rel="canonical" href="https://www.esempio-elementor.it/servizi/">',
+        '<link rel="icon" href="/favicon.png">',
+        '<style>.elementor{display:block}</style></head>',
+        '<body class="page elementor-page">',
+        '<header class="site-header"><div class="logo"><img src="/logo.png" alt="Logo"></div>',
+        '<nav class="main-menu"><ul>',
+    ]
+    for i in range(30):
+        parts.append(f'<li class="menu-item"><a href="/pagina-{i}/">Voce {i}</a></li>')
+    parts.append('</ul></nav><h1 class="site-title">Esempio</h1></header>')
+    parts.append('<div class="elementor elementor-42"><h1 class="entry-title">Servizi</h1>')
+
+    for i in range(sections):
+        parts.append(
+            f'<section class="elementor-section elementor-top-section" data-id="s{i}">'
+            '<div class="elementor-container elementor-column-gap-default">'
+            '<div class="elementor-column elementor-col-50"><div class="elementor-widget-wrap">'
+            '<div class="elementor-element elementor-widget elementor-widget-heading">'
+            '<div class="elementor-widget-container">'
+            f'<h2 class="elementor-heading-title elementor-size-default">Sezione {i} del sito</h2>'
+            '</div></div>'
+            '<div class="elementor-element elementor-widget elementor-widget-text-editor">'
+            '<div class="elementor-widget-container">'
+            f'<p>Paragrafo {i} con un testo descrittivo abbastanza lungo per simulare '
+            'contenuti reali. <a href="/servizio-{i}/">Dettagli</a> '
+            '<a href="https://partner.example.com/">Partner</a></p>'
+            '</div></div></div></div>'
+            '<div class="elementor-column elementor-col-50"><div class="elementor-widget-wrap">'
+            '<div class="elementor-element elementor-widget elementor-widget-image-gallery">'
+            '<div class="elementor-widget-container"><div class="elementor-image-gallery">'
+        )
+        for j in range(4):
+            alt = f' alt="Foto {i}-{j}"' if j % 2 == 0 else ''
+            parts.append(
+                f'<figure class="gallery-item"><img src="/wp-content/uploads/foto-{i}-{j}.jpg"{alt}>'
+                '</figure>'
+            )
+        parts.append(
+            '</div></div></div>'
+            f'<div class="elementor-widget-container"><h3>Dettaglio {i}</h3></div>'
+            '</div></div></div></section>'
+        )
+
+    parts.append('</div><footer class="site-footer"><img src="/footer-badge.png">')
+    parts.append('<p>Copyright</p></footer><script>window.dataLayer=[];</script>')
+    parts.append('</body></html>')
+    return ''.join(parts)
+
+
+def legacy_fields(analyzer: SEOAnalyzer, html: str, url: str) -> dict:
+    """Estrazione come in _analyze_page prima del PageExtractor"""
+    soup = BeautifulSoup(html, 'html.parser')
+    clean_soup = BeautifulSoup(str(soup), 'html.parser')
+    for script in clean_soup(["script", "style", "nav", "header", "footer", "noscript"]):
+        script.decompose()
+    text_content = ' '.join(clean_soup.get_text(separator=' ').split())
+    return {
+        'title': analyzer._extract_title(soup),
+        'meta_description': analyzer._extract_meta_description(soup),
+        'headings': analyzer._extract_headings(soup),
+        'images': analyzer._extract_images(soup, url),
+        'content_length': len(text_content),
+        'text_content': text_content,
+        'internal_links': analyzer._count_internal_links(soup, url),
+        'external_links': analyzer._count_external_links(soup, url),
+        'canonical': analyzer._get_canonical(soup),
+        'open_graph': analyzer._get_open_graph(soup),
+        'twitter_cards': analyzer._get_twitter_cards(soup),
+        'viewport': analyzer._get_viewport(soup),
+        'has_favicon': analyzer._has_favicon(soup, url)
+    }
+
+
+HTML_PARSER = Bs4Backend('html.parser')
+
+
+def engine_fields(analyzer: SEOAnalyzer, html: str, url: str) -> dict:
+    # stesso tree builder del vecchio percorso, così i risultati sono confrontabili
+    return analyzer._extract_page_fields(HTML_PARSER.extract(html), url)
+
+
+def cpu_time(func, runs: int) -> float:
+    start = time.process_time()
+    for _ in range(runs):
+        func()
+    return (time.process_time() - start) / runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('files', nargs='*', help="pagine HTML reali da misurare")
+    parser.add_argument('--sections', type=int, default=200,
+                        help="sezioni Elementor della pagina sintetica")
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    pages = [(f"elementor sintetica ({args.sections} sezioni)",
+              build_elementor_page(args.sections), PAGE_URL)]
+    for path in args.files:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            pages.append((os.path.basename(path), f.read(), PAGE_URL))
+
+    with SEOAnalyzer() as analyzer:
+        print(f"{'pagina':<40} {'KB':>6} {'vecchio ms':>11} {'nuovo ms':>9} {'riduzione':>10}")
+        for name, html, url in pages:
+            legacy = legacy_fields(analyzer, html, url)
+            engine = engine_fields(analyzer, html, url)
+            if legacy != engine:
+                diff = [k for k in legacy if legacy[k] != engine.get(k)]
+                print(f"❌ {name}: risultati diversi nei campi {diff}")
+                sys.exit(1)
+
+            old = cpu_time(lambda: legacy_fields(analyzer, html, url), args.runs)
+            new = cpu_time(lambda: engine_fields(analyzer, html, url), args.runs)
+            print(f"{name[:40]:<40} {len(html) / 1024:>6.0f} {old * 1000:>11.1f} "
+                  f"{new * 1000:>9.1f} {(1 - new / old) * 100:>9.0f}%")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Confronta i backend di parsing (html.parser, lxml, selectolax) su un corpus di pagine.
+
+Per ogni pagina estrae i campi SEO con ogni backend installato, li confronta con
+quelli di html.parser (riferimento) insieme ai segnali di rendering JS, e misura
+il tempo CPU di parsing + estrazione.
+
+Differenza nota: html.parser tratta `<![CDATA[...]]>` nel contenuto HTML come testo,
+lxml e lexbor (come i browser) come commento.
+
+Uso:
+    python benchmarks/check_parser_backends.py [file.html ...] [--sections N] [--runs N]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from bench_page_extraction import PAGE_URL, build_elementor_page  # noqa: E402
+from page_extractor import Bs4Backend, SelectolaxBackend  # noqa: E402
+from seo_analyzer import SEOAnalyzer  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def available_backends():
+    backends = [Bs4Backend('html.parser'), Bs4Backend('lxml')]
+    try:
+        backends.append(SelectolaxBackend())
+    except ImportError:
+        print("⚠️ selectolax non installato: backend saltato")
+    return backends
+
+
+def page_result(analyzer: SEOAnalyzer, backend, markup: bytes, url: str) -> dict:
+    nodes = backend.extract(markup)
+    return {
+        **analyzer._extract_page_fields(nodes, url),
+        'js_render_signals': analyzer._js_render_signals(nodes),
+        'is_empty': nodes.is_empty,
+    }
+
+
+def cpu_time(func, runs: int) -> float:
+    start = time.process_time()
+    for _ in range(runs):
+        func()
+    return (time.process_time() - start) / runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('files', nargs='*', help="pagine HTML (default: benchmarks/fixtures)")
+    parser.add_argument('--sections', type=int, default=200,
+                        help="sezioni Elementor della pagina sintetica")
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    pages = [(f"elementor sintetica ({args.sections} sezioni)",
+              build_elementor_page(args.sections).encode('utf-8'))]
+    for path in args.files or sorted(glob.glob(os.path.join(FIXTURES_DIR, '*.html'))):
+        with open(path, 'rb') as f:
+            pages.append((os.path.basename(path), f.read()))
+
+    backends = available_backends()
+    reference = backends[0]
+    mismatches = 0
+
+    with SEOAnalyzer() as analyzer:
+        # la favicon non deve generare richieste HTTP durante il confronto
+        analyzer._favicon_cache[PAGE_URL.split('/')[2]] = False
+
+        header = f"{'pagina':<40} {'KB':>5}" + ''.join(f" {b.name + ' ms':>15}" for b in backends)
+        print(header)
+        for name, markup in pages:
+            expected = page_result(analyzer, reference, markup, PAGE_URL)
+            timings = []
+            for backend in backends:
+                result = page_result(analyzer, backend, markup, PAGE_URL)
+                if backend is not reference and result != expected:
+                    diff = [k for k in expected if expected[k] != result.get(k)]
+                    print(f"❌ {name}: {backend.name} diverso da html.parser nei campi {diff}")
+                    mismatches += 1
+                timings.append(cpu_time(lambda: page_result(analyzer, backend, markup, PAGE_URL),
+                                        args.runs))
+            print(f"{name[:40]:<40} {len(markup) / 1024:>5.0f}" +
+                  ''.join(f" {t * 1000:>15.1f}" for t in timings))
+
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
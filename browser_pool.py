@@ -0,0 +1,529 @@
+import atexit
+import os
+import queue
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+# Selenium per rendering JS (Flazio & co.)
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from urllib3.exceptions import HTTPError as Urllib3Error
+from webdriver_manager.chrome import ChromeDriverManager
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+)
+
+# numero massimo di Chromium headless per analisi (configurabile da ambiente)
+DEFAULT_POOL_SIZE = int(os.environ.get("SEO_BROWSER_POOL_SIZE", "4"))
+
+# secondi in cui i Chromium restano vivi senza analyzer attivi (riuso tra rerun)
+POOL_IDLE_TIMEOUT = float(os.environ.get("SEO_BROWSER_IDLE_TIMEOUT", "60"))
+
+# risorse che il browser di render non scarica: per titoli, heading e alt basta il
+# DOM. Lista separata da virgole ("" = scarica tutto); gli script restano attivi
+# perché Flazio ed Elementor costruiscono la pagina via JS
+RENDER_BLOCK = os.environ.get("SEO_RENDER_BLOCK", "images,media,fonts,analytics")
+
+# pattern per Network.setBlockedURLs (DevTools): estensioni e domini per categoria
+_BLOCKED_EXTENSIONS = {
+    'images': ('png', 'jpg', 'jpeg', 'gif', 'webp', 'avif', 'svg', 'ico', 'bmp', 'tif', 'tiff'),
+    'media': ('mp4', 'webm', 'ogg', 'ogv', 'mov', 'm4v', 'avi', 'mp3', 'wav', 'm4a', 'flac', 'm3u8'),
+    'fonts': ('woff', 'woff2', 'ttf', 'otf', 'eot'),
+}
+_BLOCKED_DOMAINS = {
+    'analytics': (
+        'google-analytics.com', 'googletagmanager.com', 'doubleclick.net',
+        'googleadservices.com', 'googlesyndication.com', 'connect.facebook.net',
+        'hotjar.com', 'clarity.ms', 'mouseflow.com', 'matomo.cloud',
+        'analytics.tiktok.com', 'snap.licdn.com', 'bat.bing.com',
+    ),
+}
+RENDER_BLOCK_CATEGORIES = tuple(_BLOCKED_EXTENSIONS) + tuple(_BLOCKED_DOMAINS)
+
+# riciclo dei driver: Chromium viene riavviato dopo N pagine o se il suo albero di
+# processi supera la memoria indicata (MB, letta da /proc; 0 = nessun limite)
+BROWSER_MAX_PAGES = int(os.environ.get("SEO_BROWSER_MAX_PAGES", "100"))
+BROWSER_MAX_RSS_MB = float(os.environ.get("SEO_BROWSER_MAX_RSS_MB", "1024"))
+# la memoria si misura ogni N pagine servite dal driver: l'albero dei processi si
+# ricostruisce scorrendo tutto /proc, troppo per ogni pagina
+BROWSER_RSS_CHECK_PAGES = max(1, int(os.environ.get("SEO_BROWSER_RSS_CHECK_PAGES", "10")))
+# caricamento pagina oltre questo tempo: errore della pagina (il render non viene ripetuto)
+RENDER_PAGE_TIMEOUT = 30
+# dopo un timeout il driver deve rispondere entro questi secondi, o viene riavviato
+RESPONSIVE_TIMEOUT = 3
+# secondi concessi a driver.quit() prima di terminare i processi a forza
+QUIT_TIMEOUT = 10
+# dopo un avvio fallito si riprova solo dopo questa pausa (intanto fallback HTTP)
+SPAWN_RETRY_DELAY = 30
+
+# messaggi WebDriver di un renderer in crash o di un chromedriver non più raggiungibile
+_BROWSER_FAILURE_MARKERS = (
+    'tab crashed', 'session deleted', 'disconnected', 'not reachable',
+    'invalid session id', 'no such window', 'target window already closed',
+)
+
+# attesa adattiva del rendering: il DOM deve restare fermo per QUIET_MS
+RENDER_QUIET_MS = 500
+RENDER_MAX_WAIT = 8.0
+
+# Risolve quando il documento è "complete" e non ci sono mutazioni DOM né nuove
+# risorse caricate da quietMs, oppure allo scadere di maxMs (Flazio inietta tardi).
+# Contano solo nodi e testi aggiunti: gli attributi no, perché animazioni
+# (Lottie/SVG, ticker) li cambiano di continuo senza aggiungere contenuto
+_WAIT_FOR_RENDER_JS = """
+var quietMs = arguments[0], maxMs = arguments[1];
+var done = arguments[arguments.length - 1];
+var start = Date.now(), lastChange = start, observer = null;
+function resources() {
+    try { return performance.getEntriesByType('resource').length; } catch (e) { return 0; }
+}
+var lastResources = resources();
+try {
+    observer = new MutationObserver(function () { lastChange = Date.now(); });
+    observer.observe(document.documentElement || document, {
+        childList: true, subtree: true, characterData: true
+    });
+} catch (e) {}
+function check() {
+    var now = Date.now(), count = resources();
+    if (count !== lastResources) { lastResources = count; lastChange = now; }
+    var quiet = document.readyState === 'complete' && now - lastChange >= quietMs;
+    if (quiet || now - start >= maxMs) {
+        if (observer) { observer.disconnect(); }
+        done(now - start);
+        return;
+    }
+    setTimeout(check, 50);
+}
+check();
+"""
+
+
+def render_block_policy(spec: str = RENDER_BLOCK) -> Tuple[str, ...]:
+    """Categorie di risorse da bloccare lette da una lista separata da virgole"""
+    categories = []
+    for name in spec.split(','):
+        name = name.strip().lower()
+        if not name:
+            continue
+        if name not in RENDER_BLOCK_CATEGORIES:
+            print(f"⚠️ Categoria di risorse sconosciuta ignorata: {name}")
+        elif name not in categories:
+            categories.append(name)
+    return tuple(categories)
+
+
+def blocked_url_patterns(categories: Tuple[str, ...]) -> List[str]:
+    """Pattern URL (con *) che Chromium non deve scaricare"""
+    patterns = []
+    for category in categories:
+        for ext in _BLOCKED_EXTENSIONS.get(category, ()):
+            # anche con query string (immagini ridimensionate, cache busting)
+            patterns += [f"*.{ext}", f"*.{ext}?*"]
+        for domain in _BLOCKED_DOMAINS.get(category, ()):
+            patterns.append(f"*{domain}/*")
+    return patterns
+
+
+def apply_block_policy(driver, categories: Tuple[str, ...]) -> bool:
+    """Attiva il blocco delle risorse via DevTools; False se non supportato"""
+    patterns = blocked_url_patterns(categories)
+    if not patterns:
+        return True
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+        return True
+    except Exception as e:
+        print(f"⚠️ Blocco risorse non attivo: {e}")
+        return False
+
+
+def create_chrome_driver(block: Tuple[str, ...] = ()) -> Optional[webdriver.Chrome]:
+    """Avvia un Chromium headless (Cloud Mode con fallback locale)"""
+    chrome_options = Options()
+    chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument(f"user-agent={USER_AGENT}")
+    if 'images' in block:
+        # anche le immagini senza estensione nell'URL (CDN, endpoint dinamici)
+        chrome_options.add_experimental_option(
+            "prefs", {"profile.managed_default_content_settings.images": 2}
+        )
+    if 'media' in block:
+        chrome_options.add_argument("--autoplay-policy=user-gesture-required")
+
+    try:
+        # Modalità Cloud (es. Streamlit)
+        chrome_options.binary_location = "/usr/bin/chromium"
+        service = Service("/usr/bin/chromedriver")
+        driver = webdriver.Chrome(service=service, options=chrome_options)
+        print("✅ Selenium avviato (Cloud Mode)")
+    except Exception:
+        try:
+            # Fallback locale
+            chrome_options.binary_location = ""
+            service = Service(ChromeDriverManager().install())
+            driver = webdriver.Chrome(service=service, options=chrome_options)
+            print("✅ Selenium avviato (Local Mode)")
+        except Exception as e:
+            print(f"❌ Errore Selenium: {e}")
+            return None
+    try:
+        driver.set_page_load_timeout(RENDER_PAGE_TIMEOUT)
+    except Exception:
+        pass
+    apply_block_policy(driver, block)
+    return driver
+
+
+def is_browser_failure(error: Exception) -> bool:
+    """Errore del browser (renderer in crash, driver terminato), non della pagina: il driver
+    va riavviato. I timeout sono della pagina (vedi is_page_timeout)"""
+    if isinstance(error, TimeoutException):
+        return False
+    if isinstance(error, WebDriverException):
+        message = str(error).lower()
+        return any(marker in message for marker in _BROWSER_FAILURE_MARKERS)
+    # chromedriver terminato: la connessione HTTP locale viene rifiutata o interrotta
+    return isinstance(error, (ConnectionError, Urllib3Error))
+
+
+def is_page_timeout(error: Exception) -> bool:
+    """Pagina non caricata (o script non concluso) entro il timeout del driver"""
+    return isinstance(error, TimeoutException)
+
+
+def driver_responsive(driver, timeout: float = RESPONSIVE_TIMEOUT) -> bool:
+    """Dopo un timeout: il driver ferma il caricamento e risponde ancora? Un renderer
+    bloccato non esegue nemmeno questo script"""
+    try:
+        driver.set_script_timeout(timeout)
+        driver.execute_script("window.stop(); return 1;")
+        return True
+    except Exception:
+        return False
+
+
+# =========================================================
+# PROCESSI DEL BROWSER (/proc, solo Linux)
+# =========================================================
+def _proc_stat(pid: int) -> Optional[Tuple[int, int]]:
+    """(ppid, istante di avvio) del processo, None se non esiste più"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        return int(fields[1]), int(fields[19])
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def process_tree(pid: Optional[int]) -> Dict[int, int]:
+    """pid → istante di avvio per il processo e tutti i suoi discendenti"""
+    if not pid:
+        return {}
+    try:
+        entries = [int(entry) for entry in os.listdir('/proc') if entry.isdigit()]
+    except OSError:
+        return {}
+    children: Dict[int, List[int]] = {}
+    started: Dict[int, int] = {}
+    for child in entries:
+        stat = _proc_stat(child)
+        if stat is not None:
+            children.setdefault(stat[0], []).append(child)
+            started[child] = stat[1]
+    tree, stack = {}, [pid]
+    while stack:
+        current = stack.pop()
+        if current in started and current not in tree:
+            tree[current] = started[current]
+            stack.extend(children.get(current, ()))
+    return tree
+
+
+def tree_rss(pids) -> int:
+    """Memoria residente (byte) dei processi indicati"""
+    page_size = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+    total = 0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/statm") as f:
+                total += int(f.read().split()[1]) * page_size
+        except (OSError, IndexError, ValueError):
+            continue
+    return total
+
+
+def driver_pid(driver) -> Optional[int]:
+    """pid di chromedriver (i Chromium sono suoi discendenti)"""
+    process = getattr(getattr(driver, 'service', None), 'process', None)
+    return getattr(process, 'pid', None)
+
+
+def quit_driver(driver, timeout: float = QUIT_TIMEOUT) -> None:
+    """Chiude il driver e termina i processi rimasti (renderer bloccati, orfani)"""
+    tree = process_tree(driver_pid(driver))
+
+    def _quit():
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    # quit() su un browser bloccato può non tornare mai
+    closer = threading.Thread(target=_quit, daemon=True)
+    closer.start()
+    closer.join(timeout)
+
+    for pid, started in tree.items():
+        # stesso pid e stesso istante di avvio: non è un processo nuovo con il pid riusato
+        stat = _proc_stat(pid)
+        if stat is not None and stat[1] == started:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except OSError:
+                pass
+
+    # se siamo il padre (o il subreaper, es. PID 1 nei container) raccogliamo gli zombie;
+    # gli altri processi li raccoglie init
+    deadline = time.monotonic() + 1.0
+    for pid in tree:
+        while True:
+            try:
+                reaped, _ = os.waitpid(pid, os.WNOHANG)
+            except OSError:
+                break
+            if reaped or time.monotonic() >= deadline:
+                break
+            time.sleep(0.05)
+
+
+def wait_for_render(driver, max_wait: float = RENDER_MAX_WAIT,
+                    quiet_ms: int = RENDER_QUIET_MS) -> float:
+    """Attende che la pagina sia pronta e stabile; restituisce i secondi attesi"""
+    start = time.time()
+    try:
+        driver.set_script_timeout(max_wait + 2)
+        driver.execute_async_script(_WAIT_FOR_RENDER_JS, quiet_ms, int(max_wait * 1000))
+    except Exception:
+        # script non eseguibile (pagina in crash, alert, ...): usa il tempo già atteso
+        pass
+    return time.time() - start
+
+
+class BrowserPool:
+    """Pool di Chromium headless: ogni driver è usato da un solo worker alla volta.
+
+    I driver partono solo alla prima acquire(). Il pool condiviso di processo
+    (BrowserPool.shared) conta gli analyzer che lo usano e chiude i browser quando
+    l'ultimo li rilascia, dopo un breve periodo di inattività.
+
+    Al rilascio un driver viene riciclato (chiuso, e riavviato alla prossima
+    acquire) dopo `max_pages` pagine, se i suoi processi superano `max_rss_mb`
+    (misurati ogni BROWSER_RSS_CHECK_PAGES pagine) o se è stato segnato come guasto (renderer bloccato o in crash). La chiusura
+    termina anche i processi Chromium rimasti orfani.
+    """
+
+    _shared: Optional["BrowserPool"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, size: int = DEFAULT_POOL_SIZE,
+                 idle_timeout: float = POOL_IDLE_TIMEOUT,
+                 block: Optional[Tuple[str, ...]] = None,
+                 max_pages: int = BROWSER_MAX_PAGES,
+                 max_rss_mb: float = BROWSER_MAX_RSS_MB):
+        self.size = max(1, int(size))
+        self.idle_timeout = idle_timeout
+        # categorie di risorse non scaricate durante il render (RENDER_BLOCK)
+        self.block = render_block_policy() if block is None else tuple(block)
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self._drivers: List[webdriver.Chrome] = []
+        self._pages: Dict[webdriver.Chrome, int] = {}  # pagine servite da ogni driver
+        self._broken = set()
+        self._recycled = {'pages': 0, 'memory': 0, 'crash': 0}
+        self._peak_rss = 0
+        # dopo un avvio fallito: fallback HTTP fino a questo istante, poi si riprova
+        self._spawn_retry_at = 0.0
+        self._idle: "queue.Queue[webdriver.Chrome]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._starting = 0
+        self._refs = 0
+        self._idle_timer: Optional[threading.Timer] = None
+
+    @classmethod
+    def shared(cls, size: int = DEFAULT_POOL_SIZE) -> "BrowserPool":
+        """Pool unico per processo (es. tutte le sessioni Streamlit)"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls(size)
+                atexit.register(cls._shared.close)
+            elif size > cls._shared.size:
+                cls._shared.size = size
+            return cls._shared
+
+    # ---------------------------------------------------------
+    # reference counting
+    # ---------------------------------------------------------
+    def retain(self) -> "BrowserPool":
+        with self._lock:
+            self._refs += 1
+            if self._idle_timer is not None:
+                self._idle_timer.cancel()
+                self._idle_timer = None
+        return self
+
+    def release_ref(self) -> None:
+        with self._lock:
+            self._refs = max(0, self._refs - 1)
+            if self._refs or not self._drivers:
+                return
+            if self.idle_timeout <= 0:
+                timer = None
+            else:
+                timer = self._idle_timer = threading.Timer(
+                    self.idle_timeout, self._close_if_unused
+                )
+                timer.daemon = True
+        if timer is None:
+            self.close()
+        else:
+            timer.start()
+
+    def _close_if_unused(self) -> None:
+        with self._lock:
+            if self._refs:
+                return
+            self._idle_timer = None
+        self.close()
+
+    @property
+    def started(self) -> int:
+        return len(self._drivers)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'size': self.size,
+                'started': self.started,
+                'blocked': list(self.block),
+                'recycled': dict(self._recycled),
+                'peak_rss_mb': round(self._peak_rss / 2 ** 20),
+            }
+
+    def _spawn(self) -> Optional[webdriver.Chrome]:
+        # riserva lo slot sotto lock, ma avvia Chromium fuori dal lock
+        with self._lock:
+            if len(self._drivers) + self._starting >= self.size:
+                return None
+            if time.monotonic() < self._spawn_retry_at:
+                return None
+            self._starting += 1
+
+        driver = create_chrome_driver(self.block)
+
+        with self._lock:
+            self._starting -= 1
+            if driver is None:
+                # Chromium non parte: niente nuovi tentativi ad ogni pagina
+                self._spawn_retry_at = time.monotonic() + SPAWN_RETRY_DELAY
+                return None
+            self._drivers.append(driver)
+            self._pages[driver] = 0
+            return driver
+
+    def acquire(self) -> Optional[webdriver.Chrome]:
+        """Restituisce un driver libero, avviandone uno nuovo se il pool non è pieno"""
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+
+            driver = self._spawn()
+            if driver is not None:
+                return driver
+
+            with self._lock:
+                if not (self._drivers or self._starting):
+                    return None
+            # pool pieno: aspetta che un worker liberi il suo driver
+            # (o che un driver riciclato lasci il posto a uno nuovo)
+            try:
+                return self._idle.get(timeout=1)
+            except queue.Empty:
+                continue
+
+    def mark_broken(self, driver: Optional[webdriver.Chrome]) -> None:
+        """Renderer bloccato o in crash: al rilascio il driver viene chiuso e sostituito"""
+        with self._lock:
+            if driver in self._pages:
+                self._broken.add(driver)
+
+    def release(self, driver: Optional[webdriver.Chrome]) -> None:
+        if driver is None:
+            return
+        reason = self._recycle_reason(driver)
+        if reason is None:
+            self._idle.put(driver)
+            return
+        with self._lock:
+            if reason == 'closed' or driver not in self._pages:
+                return
+            self._drivers.remove(driver)
+            pages = self._pages.pop(driver)
+            self._broken.discard(driver)
+            self._recycled[reason] += 1
+        print(f"♻️ Chromium riciclato ({reason}, {pages} pagine)")
+        quit_driver(driver)
+
+    def _recycle_reason(self, driver: webdriver.Chrome) -> Optional[str]:
+        with self._lock:
+            if driver not in self._pages:
+                # pool chiuso mentre il driver era in uso: è già stato terminato
+                return 'closed'
+            self._pages[driver] += 1
+            if driver in self._broken:
+                return 'crash'
+            if self.max_pages and self._pages[driver] >= self.max_pages:
+                return 'pages'
+            check_rss = self._pages[driver] % BROWSER_RSS_CHECK_PAGES == 0
+        if self.max_rss_mb and check_rss:
+            rss = tree_rss(process_tree(driver_pid(driver)))
+            with self._lock:
+                self._peak_rss = max(self._peak_rss, rss)
+            if rss > self.max_rss_mb * 2 ** 20:
+                return 'memory'
+        return None
+
+    @contextmanager
+    def driver(self):
+        driver = self.acquire()
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def close(self) -> None:
+        """Chiude tutti i Chromium avviati (i successivi acquire li riavviano)"""
+        with self._lock:
+            if self._idle_timer is not None:
+                self._idle_timer.cancel()
+                self._idle_timer = None
+            drivers, self._drivers = self._drivers, []
+            self._pages.clear()
+            self._broken.clear()
+            self._spawn_retry_at = 0.0
+            self._idle = queue.Queue()
+        for driver in drivers:
+            quit_driver(driver)
@@ -0,0 +1,132 @@
+import random
+import threading
+import time
+from typing import Dict, Optional
+
+import requests
+
+# errori di rete consecutivi (timeout, connessione) che fanno scattare il circuito
+FAILURE_THRESHOLD = 3
+# circuito aperto: secondi prima di una richiesta di prova, raddoppiati a ogni nuovo scatto
+OPEN_COOLDOWN = 30.0
+OPEN_COOLDOWN_MAX = 300.0
+
+# budget dei tentativi per host: RETRY_BUDGET_MIN + RETRY_BUDGET_RATIO × richieste
+RETRY_BUDGET_MIN = 3
+RETRY_BUDGET_RATIO = 0.1
+# attesa prima del tentativo n: BACKOFF_BASE × 2^n (con jitter), al massimo BACKOFF_MAX
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+
+RETRYABLE_METHODS = ('GET', 'HEAD')
+
+
+class HostUnreachable(requests.ConnectionError):
+    """Richiesta non inviata: il circuito dell'host è aperto"""
+
+
+class _HostCircuit:
+    __slots__ = ('failures', 'open_until', 'trips', 'probing', 'requests', 'retries',
+                 'skipped', 'last_error')
+
+    def __init__(self):
+        self.failures = 0  # errori di rete consecutivi
+        self.open_until = 0.0
+        self.trips = 0
+        self.probing = False  # richiesta di prova in corso (half-open)
+        self.requests = self.retries = self.skipped = 0
+        self.last_error = ''
+
+
+class CircuitBreaker:
+    """Interruttore per host contro siti morti o che non rispondono.
+
+    Dopo FAILURE_THRESHOLD errori di rete consecutivi il circuito si apre: le
+    richieste successive all'host falliscono subito con HostUnreachable invece di
+    aspettare il timeout. Trascorso il cooldown passa una sola richiesta di prova:
+    se riesce il circuito si richiude, altrimenti si riapre con cooldown doppio.
+    I tentativi ripetuti (GET/HEAD, backoff esponenziale) sono limitati da un
+    budget per host proporzionale alle richieste, per non moltiplicare il carico.
+    """
+
+    def __init__(self, failure_threshold: int = FAILURE_THRESHOLD,
+                 cooldown: float = OPEN_COOLDOWN):
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self._hosts: Dict[str, _HostCircuit] = {}
+        self._lock = threading.Lock()
+
+    def _circuit(self, host: str) -> _HostCircuit:
+        # chiamato con il lock acquisito
+        circuit = self._hosts.get(host)
+        if circuit is None:
+            circuit = self._hosts[host] = _HostCircuit()
+        return circuit
+
+    def before_request(self, host: str) -> None:
+        """Solleva HostUnreachable se il circuito è aperto (o la prova è già in corso)"""
+        with self._lock:
+            circuit = self._circuit(host)
+            circuit.requests += 1
+            if circuit.failures < self.failure_threshold:
+                return
+            if time.monotonic() >= circuit.open_until and not circuit.probing:
+                circuit.probing = True  # half-open: passa solo questa richiesta
+                return
+            circuit.skipped += 1
+            error = circuit.last_error
+        raise HostUnreachable(f"Host {host} non raggiungibile ({error})")
+
+    def on_success(self, host: str) -> None:
+        with self._lock:
+            circuit = self._circuit(host)
+            circuit.failures = 0
+            circuit.probing = False
+
+    def on_failure(self, host: str, error: Exception, attempt: int,
+                   method: str) -> Optional[float]:
+        """Registra l'errore; secondi da attendere prima di riprovare, None per rinunciare"""
+        if isinstance(error, HostUnreachable):
+            return None
+        with self._lock:
+            circuit = self._circuit(host)
+            if not self._is_network_error(error):
+                circuit.probing = False
+                return None
+            circuit.failures += 1
+            circuit.last_error = type(error).__name__
+            if circuit.probing or circuit.failures >= self.failure_threshold:
+                circuit.probing = False
+                if circuit.failures >= self.failure_threshold:
+                    cooldown = min(self.cooldown * 2 ** circuit.trips, OPEN_COOLDOWN_MAX)
+                    circuit.open_until = time.monotonic() + cooldown
+                    circuit.trips += 1
+                    circuit.failures = self.failure_threshold
+                return None
+
+            budget = RETRY_BUDGET_MIN + RETRY_BUDGET_RATIO * circuit.requests
+            if method.upper() not in RETRYABLE_METHODS or circuit.retries >= budget:
+                return None
+            circuit.retries += 1
+        backoff = min(BACKOFF_BASE * 2 ** attempt, BACKOFF_MAX)
+        return backoff * random.uniform(0.5, 1.0)
+
+    def is_open(self, host: str) -> bool:
+        """Host dato per irraggiungibile (circuito aperto o in prova)"""
+        with self._lock:
+            circuit = self._hosts.get(host)
+            return circuit is not None and circuit.failures >= self.failure_threshold
+
+    @staticmethod
+    def _is_network_error(error: Exception) -> bool:
+        # gli errori HTTP (4xx/5xx) sono risposte: il server è raggiungibile
+        return isinstance(error, (requests.Timeout, requests.ConnectionError))
+
+    def stats(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {
+                host: {'open': c.failures >= self.failure_threshold, 'trips': c.trips,
+                       'requests': c.requests, 'retries': c.retries, 'skipped': c.skipped,
+                       'last_error': c.last_error}
+                for host, c in self._hosts.items() if c.trips or c.retries
+            }
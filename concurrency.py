@@ -0,0 +1,167 @@
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional, Tuple, Union
+
+import requests
+
+# richieste in parallelo per host: valore iniziale e limiti del controllo adattivo
+INITIAL_HOST_CONCURRENCY = 4
+MIN_HOST_CONCURRENCY = 1
+MAX_HOST_CONCURRENCY = 16
+
+# latenza media (EWMA) rispetto alla migliore osservata: fino a TOLERANCE è "piatta"
+# e si può crescere, oltre DEGRADED il server sta rallentando e si riduce
+LATENCY_TOLERANCE = 1.5
+LATENCY_DEGRADED = 2.5
+EWMA_WEIGHT = 0.2
+# la latenza di riferimento segue piano un rallentamento stabile (pagine più pesanti)
+BASELINE_DRIFT = 0.002
+
+# riduzione moltiplicativa: errori (429, 5xx, timeout) e latenza degradata
+ERROR_DECREASE = 0.5
+LATENCY_DECREASE = 0.75
+
+# decisioni tenute nei metadati dell'analisi
+DECISION_LOG_SIZE = 200
+
+Outcome = Union[int, Exception, None]  # status HTTP, eccezione o nessuna risposta
+
+
+class _HostState:
+    __slots__ = ('limit', 'in_flight', 'epoch', 'successes', 'ewma', 'baseline',
+                 'peak', 'increases', 'decreases', 'errors', 'requests')
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_flight = 0
+        self.epoch = 0  # cambia a ogni riduzione: le risposte partite prima non contano
+        self.successes = 0
+        self.ewma: Optional[float] = None
+        self.baseline: Optional[float] = None
+        self.peak = limit
+        self.increases = self.decreases = self.errors = self.requests = 0
+
+
+class AdaptiveConcurrency:
+    """Concorrenza per host AIMD (aumento additivo, riduzione moltiplicativa).
+
+    Ogni host parte da `initial` richieste in parallelo. Se il limite viene usato
+    tutto e la latenza resta piatta, dopo un "giro" di risposte riuscite (tante
+    quante il limite) cresce di uno; con 429, 5xx o timeout si dimezza, con la
+    latenza degradata scende a 3/4. Le risposte partite prima di una riduzione
+    non ne provocano un'altra (niente crolli a catena). Ogni decisione viene
+    registrata per i metadati dell'analisi.
+    """
+
+    def __init__(self, initial: int = INITIAL_HOST_CONCURRENCY,
+                 min_limit: int = MIN_HOST_CONCURRENCY, max_limit: int = MAX_HOST_CONCURRENCY):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.initial = min(max(initial, self.min_limit), self.max_limit)
+        self._hosts: Dict[str, _HostState] = {}
+        self._decisions = deque(maxlen=DECISION_LOG_SIZE)
+        self._cond = threading.Condition()
+        self._started = time.monotonic()
+
+    def limit(self, host: str) -> int:
+        with self._cond:
+            state = self._hosts.get(host)
+            return state.limit if state else self.initial
+
+    def acquire(self, host: str) -> Tuple[int, bool]:
+        """Attende un posto libero per l'host: (epoca, limite saturato)"""
+        with self._cond:
+            state = self._hosts.get(host)
+            if state is None:
+                state = self._hosts[host] = _HostState(self.initial)
+            while state.in_flight >= state.limit:
+                self._cond.wait()
+            state.in_flight += 1
+            state.requests += 1
+            return state.epoch, state.in_flight >= state.limit
+
+    def release(self, host: str, token: Tuple[int, bool], elapsed: float,
+                outcome: Outcome) -> None:
+        """Libera il posto e aggiorna il limite in base all'esito della richiesta"""
+        epoch, saturated = token
+        with self._cond:
+            state = self._hosts[host]
+            state.in_flight -= 1
+            self._update(host, state, epoch, saturated, elapsed, outcome)
+            self._cond.notify_all()
+
+    def _update(self, host: str, state: _HostState, epoch: int, saturated: bool,
+                elapsed: float, outcome: Outcome) -> None:
+        if self._is_overload(outcome):
+            state.errors += 1
+            if epoch == state.epoch:
+                reason = outcome if isinstance(outcome, int) else type(outcome).__name__
+                self._decrease(host, state, ERROR_DECREASE, f"errore {reason}", elapsed)
+            return
+        if not isinstance(outcome, int):
+            # errori che non dipendono dal carico (URL non valido, SSL...)
+            return
+
+        state.ewma = elapsed if state.ewma is None else (
+            (1 - EWMA_WEIGHT) * state.ewma + EWMA_WEIGHT * elapsed)
+        if state.baseline is None or state.ewma < state.baseline:
+            state.baseline = state.ewma
+        else:
+            state.baseline += (state.ewma - state.baseline) * BASELINE_DRIFT
+
+        if state.ewma > state.baseline * LATENCY_DEGRADED:
+            if epoch == state.epoch:
+                self._decrease(host, state, LATENCY_DECREASE, "latenza in aumento", elapsed)
+        elif state.ewma <= state.baseline * LATENCY_TOLERANCE and saturated:
+            state.successes += 1
+            if state.successes >= state.limit and state.limit < self.max_limit:
+                state.limit += 1
+                state.successes = 0
+                state.increases += 1
+                state.peak = max(state.peak, state.limit)
+                self._record(host, 'increase', state, "latenza stabile", elapsed)
+
+    def _decrease(self, host: str, state: _HostState, factor: float, reason: str,
+                  elapsed: float) -> None:
+        state.limit = max(self.min_limit, int(state.limit * factor))
+        state.epoch += 1
+        state.successes = 0
+        state.decreases += 1
+        self._record(host, 'decrease', state, reason, elapsed)
+
+    @staticmethod
+    def _is_overload(outcome: Outcome) -> bool:
+        if isinstance(outcome, int):
+            return outcome == 429 or outcome >= 500
+        return isinstance(outcome, (requests.Timeout, requests.ConnectionError))
+
+    def _record(self, host: str, action: str, state: _HostState, reason: str,
+                elapsed: float) -> None:
+        self._decisions.append({
+            't': round(time.monotonic() - self._started, 3),
+            'host': host,
+            'action': action,
+            'limit': state.limit,
+            'reason': reason,
+            'latency_ms': round(elapsed * 1000),
+            'ewma_ms': round(state.ewma * 1000) if state.ewma is not None else None,
+        })
+
+    def stats(self) -> Dict:
+        """Metadati per l'analisi: stato finale per host e ultime decisioni"""
+        with self._cond:
+            hosts = {
+                host: {
+                    'limit': s.limit,
+                    'peak': s.peak,
+                    'requests': s.requests,
+                    'errors': s.errors,
+                    'increases': s.increases,
+                    'decreases': s.decreases,
+                    'baseline_ms': round(s.baseline * 1000) if s.baseline is not None else None,
+                    'ewma_ms': round(s.ewma * 1000) if s.ewma is not None else None,
+                }
+                for host, s in self._hosts.items()
+            }
+            return {'hosts': hosts, 'decisions': list(self._decisions)}
@@ -0,0 +1,231 @@
+import hashlib
+import heapq
+import math
+import os
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+from fetcher import HTML_CONTENT_TYPES, PAGE_MAX_BYTES
+from time_budget import TimeBudget, TimeBudgetExceeded
+from url_normalizer import normalize_url, site_key, url_key, without_query
+
+# pagine analizzate per sito e profondità del crawl (configurabili da ambiente)
+DEFAULT_MAX_PAGES = int(os.environ.get("SEO_MAX_PAGES", "50"))
+CRAWL_MAX_DEPTH = int(os.environ.get("SEO_CRAWL_DEPTH", "3"))
+
+# pagine scaricate in parallelo per ogni passo del crawl
+CRAWL_BATCH_SIZE = 16
+
+# URL in attesa nella frontiera: oltre si scartano i nuovi link (memoria limitata)
+FRONTIER_MAX_SIZE = 100_000
+
+# risorse che non sono pagine HTML: non vengono scaricate né analizzate
+SKIPPED_EXTENSIONS = (
+    '.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.ico', '.bmp', '.avif',
+    '.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx', '.zip', '.rar', '.gz',
+    '.mp3', '.mp4', '.avi', '.mov', '.webm', '.css', '.js', '.json', '.xml', '.txt',
+    '.woff', '.woff2', '.ttf', '.eot',
+)
+
+# sezioni che di solito duplicano contenuti (archivi, paginazione): priorità più bassa
+LOW_PRIORITY_SEGMENTS = ('page', 'tag', 'tags', 'category', 'categoria', 'author', 'feed')
+
+
+class BloomFilter:
+    """Insieme probabilistico a dimensione fissa: nessun falso negativo,
+    falsi positivi con probabilità `error_rate` fino a `capacity` elementi."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        # double hashing (Kirsch-Mitzenmacher) da un solo digest
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def add(self, item: str) -> bool:
+        """Aggiunge l'elemento; False se era (probabilmente) già presente"""
+        new = False
+        for pos in self._positions(item):
+            mask = 1 << (pos & 7)
+            if not self.bits[pos >> 3] & mask:
+                self.bits[pos >> 3] |= mask
+                new = True
+        if new:
+            self.count += 1
+        return new
+
+
+class SeenSet:
+    """URL già visti in memoria compatta: Bloom filter che si aggiungono man mano
+    (ognuno con capacità doppia e errore dimezzato), ~4 byte per URL anche oltre 100k URL."""
+
+    def __init__(self, initial_capacity: int = 10_000, error_rate: float = 0.001):
+        self._error_rate = error_rate / 2
+        self._filters = [BloomFilter(initial_capacity, self._error_rate)]
+
+    def __contains__(self, url: str) -> bool:
+        return any(url in bloom for bloom in self._filters)
+
+    def add(self, url: str) -> bool:
+        if url in self:
+            return False
+        current = self._filters[-1]
+        if current.count >= current.capacity:
+            current = BloomFilter(current.capacity * 2, current.error_rate / 2)
+            self._filters.append(current)
+        current.add(url)
+        return True
+
+    def __len__(self) -> int:
+        return sum(bloom.count for bloom in self._filters)
+
+    @property
+    def memory_bytes(self) -> int:
+        return sum(len(bloom.bits) for bloom in self._filters)
+
+
+class CrawlFrontier:
+    """Coda di priorità del crawl: prima per profondità (visita in ampiezza), poi per
+    priorità dell'URL, poi in ordine di scoperta. Ogni pagina (url_key) entra una volta."""
+
+    def __init__(self, max_size: int = FRONTIER_MAX_SIZE,
+                 accept: Optional[Callable[[str], bool]] = None):
+        self.max_size = max_size
+        self.accept = accept  # es. robots.txt: gli URL rifiutati non vengono mai scaricati
+        self.seen = SeenSet()
+        self.dropped = 0
+        self.rejected = 0
+        self._heap: List[Tuple[int, int, int, str]] = []
+        self._counter = 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, url: str, depth: int) -> bool:
+        if not self.seen.add(url_key(url)):
+            return False
+        if self.accept is not None and not self.accept(url):
+            self.rejected += 1
+            return False
+        if len(self._heap) >= self.max_size:
+            self.dropped += 1
+            return False
+        self._counter += 1
+        heapq.heappush(self._heap, (depth, self.priority(url), self._counter, url))
+        return True
+
+    def pop_batch(self, count: int) -> List[Tuple[str, int]]:
+        batch = []
+        while self._heap and len(batch) < count:
+            depth, _, _, url = heapq.heappop(self._heap)
+            batch.append((url, depth))
+        return batch
+
+    @staticmethod
+    def priority(url: str) -> int:
+        """Più basso = prima: pagine vicine alla radice, archivi e paginazione in fondo"""
+        segments = [s for s in urlparse(url).path.lower().split('/') if s]
+        score = len(segments)
+        if any(s in LOW_PRIORITY_SEGMENTS for s in segments):
+            score += 10
+        return score
+
+
+class SiteCrawler:
+    """Crawl in ampiezza dello stesso sito a partire da un URL.
+
+    Scarica a gruppi con il motore HTTP dell'analyzer, segue solo i link dello
+    stesso sito (www compreso) fino a `max_depth` e restituisce al massimo
+    `max_pages` pagine HTML raggiungibili, in ordine di visita. Con un `budget`
+    di tempo esaurito si ferma: stats['partial'] lo segnala e stats['unvisited']
+    conta gli URL rimasti. stats['seen_bytes'] è la memoria degli URL già visti.
+    """
+
+    def __init__(self, fetcher, extract_links: Callable[[object], List[str]],
+                 max_pages: int = DEFAULT_MAX_PAGES, max_depth: int = CRAWL_MAX_DEPTH,
+                 accept: Optional[Callable[[str], bool]] = None,
+                 batch_size: int = CRAWL_BATCH_SIZE, budget: Optional[TimeBudget] = None):
+        self.fetcher = fetcher
+        self.extract_links = extract_links
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.batch_size = batch_size
+        self.budget = budget
+        self.frontier = CrawlFrontier(accept=accept)
+        self.stats: Dict[str, int] = {'fetched': 0, 'pages': 0, 'max_depth': 0}
+
+    def crawl(self, start_url: str) -> List[str]:
+        start_url = without_query(start_url)
+        site = site_key(urlparse(normalize_url(start_url)).netloc)
+        self.frontier.push(start_url, 0)
+        pages: List[str] = []
+        unvisited = 0
+        out_of_time = False
+
+        while len(self.frontier) and len(pages) < self.max_pages and not out_of_time:
+            if self.budget is not None and self.budget.expired():
+                out_of_time = True
+                break
+            batch = self.frontier.pop_batch(min(self.batch_size, self.max_pages - len(pages)))
+            responses = self.fetcher.fetch_all([url for url, _ in batch], max_bytes=PAGE_MAX_BYTES,
+                                               content_types=HTML_CONTENT_TYPES)
+            self.stats['fetched'] += len(batch)
+
+            for (url, depth), response in zip(batch, responses):
+                if isinstance(response, TimeBudgetExceeded):
+                    unvisited += 1
+                    out_of_time = True
+                    continue
+                if not self._is_html_page(response):
+                    continue
+                # redirect verso un altro sito: la pagina non fa parte dell'audit
+                final_url = response.url or url
+                if site_key(urlparse(normalize_url(final_url)).netloc) != site:
+                    continue
+                if len(pages) < self.max_pages:
+                    pages.append(url)
+                    self.stats['max_depth'] = max(self.stats['max_depth'], depth)
+                if depth < self.max_depth:
+                    for href in self.extract_links(response):
+                        link = self._crawlable(urljoin(final_url, href), site)
+                        if link:
+                            self.frontier.push(link, depth + 1)
+
+        self.stats['pages'] = len(pages)
+        self.stats['seen'] = len(self.frontier.seen)
+        self.stats['seen_bytes'] = self.frontier.seen.memory_bytes()
+        self.stats['frontier_dropped'] = self.frontier.dropped
+        self.stats['rejected'] = self.frontier.rejected
+        self.stats['partial'] = out_of_time
+        self.stats['unvisited'] = unvisited + len(self.frontier) if out_of_time else 0
+        return pages
+
+    def _crawlable(self, url: str, site: str) -> Optional[str]:
+        parsed = urlparse(url)
+        if parsed.scheme not in ('http', 'https') or site_key(parsed.netloc) != site:
+            return None
+        if parsed.path.lower().endswith(SKIPPED_EXTENSIONS):
+            return None
+        # come il vecchio _discover_urls: le query (filtri, ricerche) non si seguono;
+        # la deduplica usa url_key, l'URL scaricato resta quello del link
+        return without_query(url)
+
+    @staticmethod
+    def _is_html_page(response) -> bool:
+        if isinstance(response, Exception) or response.status_code != 200:
+            return False
+        if getattr(response, 'body_skipped', False):
+            return False
+        content_type = response.headers.get('Content-Type', '')
+        return not content_type or 'html' in content_type.lower()
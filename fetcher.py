@@ -0,0 +1,316 @@
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import partial
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from circuit_breaker import CircuitBreaker
+from concurrency import AdaptiveConcurrency
+from politeness import HostScheduler
+from time_budget import TimeBudget, TimeBudgetExceeded
+
+# limiti di concorrenza: complessivi e per singolo host (per non martellare un sito)
+MAX_CONCURRENCY = 16
+MAX_PER_HOST = 4
+
+# risposte tenute in memoria per analisi: oltre si scartano le meno usate (crawl grandi).
+# Il limite in byte conta i corpi delle risposte: 1024 pagine da 5 MB non stanno in RAM
+RESPONSE_CACHE_MAX_ENTRIES = 1024
+RESPONSE_CACHE_MAX_BYTES = int(float(os.environ.get("SEO_RESPONSE_CACHE_MB", "64")) * 1024 * 1024)
+
+# download delle pagine: corpo letto in streaming fino a PAGE_MAX_BYTES e solo se
+# il Content-Type è HTML (PDF, immagini e video elencati nelle sitemap non si scaricano)
+PAGE_MAX_BYTES = int(float(os.environ.get("SEO_PAGE_MAX_MB", "5")) * 1024 * 1024)
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+_DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+FetchResult = Union[requests.Response, Exception]
+
+
+class ResponseCache:
+    """Cache delle risposte HTTP per una singola analisi, chiave (metodo, URL, Range,
+    variante del download: es. pagina limitata in byte e tipo).
+
+    robots.txt e sitemap servono a più fasi (ricerca sitemap, estrazione URL,
+    analisi robots, report): con la cache ogni risorsa viene scaricata una sola
+    volta. Richieste concorrenti sulla stessa chiave aspettano quella in corso.
+    Anche gli errori restano in cache: un host che va in timeout non viene
+    ritentato da ogni fase. Oltre `max_entries` risposte o `max_bytes` byte di corpi
+    in memoria vengono scartate quelle usate meno di recente (LRU); l'ultima
+    risposta resta comunque, anche se da sola supera il limite.
+    """
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES,
+                 max_bytes: int = RESPONSE_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, str, str, str], FetchResult]" = OrderedDict()
+        self._sizes: Dict[Tuple[str, str, str, str], int] = {}
+        self.bytes = 0
+        self._pending: Dict[Tuple[str, str, str, str], threading.Event] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_fetch(self, method: str, url: str, fetch, byte_range: str = '',
+                     variant: str = '') -> FetchResult:
+        # una risposta parziale (Range o limitata) non vale per il download completo
+        key = (method.upper(), url, byte_range, variant)
+        while True:
+            with self._lock:
+                if key in self._entries:
+                    self.hits += 1
+                    self._entries.move_to_end(key)
+                    return self._entries[key]
+                pending = self._pending.get(key)
+                if pending is None:
+                    self.misses += 1
+                    pending = self._pending[key] = threading.Event()
+                    break
+            # stessa risorsa già in download da un altro worker
+            pending.wait()
+
+        try:
+            try:
+                result = fetch()
+            except Exception as e:
+                result = e
+            size = self._body_size(result)
+            with self._lock:
+                self._entries[key] = result
+                self._sizes[key] = size
+                self.bytes += size
+                while len(self._entries) > 1 and (len(self._entries) > self.max_entries
+                                                  or self.bytes > self.max_bytes):
+                    old_key, _ = self._entries.popitem(last=False)
+                    self.bytes -= self._sizes.pop(old_key)
+            return result
+        finally:
+            with self._lock:
+                del self._pending[key]
+            pending.set()
+
+    @staticmethod
+    def _body_size(result: FetchResult) -> int:
+        # corpo già in memoria (risposte non in streaming o lette da _download)
+        content = getattr(result, '_content', None)
+        return len(content) if isinstance(content, bytes) else 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries),
+                    'bytes': self.bytes}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.hits = self.misses = self.bytes = 0
+
+
+class AsyncFetcher:
+    """Motore HTTP: molte richieste in parallelo con limiti globali e per host.
+
+    Le richieste passano dalla requests.Session dell'analyzer (header, cookie,
+    adapter) e girano su un ThreadPoolExecutor condiviso, senza event loop: il
+    pool limita la concorrenza globale, e fetch_all() sottomette al pool al
+    massimo `per_host` worker per host, che scaricano a turno gli URL di
+    quell'host: i thread non restano fermi in attesa di un host lento. Lo scheduler di cortesia distanzia le richieste
+    (Crawl-delay) host per host.
+    Con un controllo adattivo (`concurrency`) il limite per host non è fisso ma
+    segue latenza ed errori del server; l'interruttore per host (`breaker`) ripete
+    gli errori di rete con backoff e salta gli host che non rispondono. Con un
+    `budget` di tempo le richieste oltre la scadenza non partono.
+    """
+
+    def __init__(self, session: requests.Session, max_concurrency: int = MAX_CONCURRENCY,
+                 per_host: int = MAX_PER_HOST, timeout: float = 20,
+                 cache: Optional[ResponseCache] = None,
+                 scheduler: Optional[HostScheduler] = None,
+                 concurrency: Optional[AdaptiveConcurrency] = None,
+                 breaker: Optional[CircuitBreaker] = None,
+                 budget: Optional[TimeBudget] = None,
+                 adapter_class: type = HTTPAdapter, **adapter_kwargs):
+        self.session = session
+        self.cache = cache
+        self.scheduler = scheduler
+        self.concurrency = concurrency
+        self.breaker = breaker
+        self.budget = budget
+        self.max_concurrency = max(1, max_concurrency)
+        self.per_host = max(1, per_host)
+        self.timeout = timeout
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency, thread_name_prefix='seo-fetch'
+        )
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+        # abbastanza connessioni keep-alive per tutti i worker
+        adapter = adapter_class(pool_connections=self.max_concurrency,
+                                pool_maxsize=self.max_concurrency, **adapter_kwargs)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+
+    # ---------------------------------------------------------
+    # API sincrona (usata da SEOAnalyzer)
+    # ---------------------------------------------------------
+    def fetch_all(self, urls: Sequence[str], method: str = 'GET',
+                  **kwargs) -> List[FetchResult]:
+        """Scarica tutti gli URL in parallelo; l'ordine dei risultati è quello di `urls`.
+        Gli errori sono restituiti come eccezioni al posto della risposta."""
+        if not urls:
+            return []
+        # con il controllo adattivo il limite effettivo si applica nei thread
+        per_host = self.concurrency.max_limit if self.concurrency else self.per_host
+        results: List[FetchResult] = [None] * len(urls)
+        waiting: Dict[str, deque] = {}
+        for index, url in enumerate(urls):
+            waiting.setdefault(urlparse(url).netloc, deque()).append(index)
+
+        def drain(queue: deque) -> None:
+            # ogni worker scarica in sequenza gli URL rimasti del suo host
+            while True:
+                try:
+                    index = queue.popleft()
+                except IndexError:
+                    return
+                try:
+                    results[index] = self._request(method, urls[index], kwargs)
+                except Exception as e:
+                    results[index] = e
+
+        workers = [self._executor.submit(drain, queue) for queue in waiting.values()
+                   for _ in range(min(per_host, len(queue)))]
+        wait(workers)
+        return results
+
+    def fetch(self, url: str, method: str = 'GET', **kwargs) -> requests.Response:
+        result = self.fetch_all([url], method, **kwargs)[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def _request(self, method: str, url: str, kwargs: Dict) -> requests.Response:
+        # le risposte in streaming si leggono una volta sola: niente cache
+        if self.cache is None or kwargs.get('stream'):
+            return self._send(method, url, kwargs)
+        byte_range = (kwargs.get('headers') or {}).get('Range', '')
+        variant = ''
+        if kwargs.get('max_bytes') or kwargs.get('content_types'):
+            variant = f"{kwargs.get('max_bytes')}|{','.join(kwargs.get('content_types') or ())}"
+        result = self.cache.get_or_fetch(method, url, partial(self._send, method, url, kwargs),
+                                         byte_range, variant)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def _send(self, method: str, url: str, kwargs: Dict) -> requests.Response:
+        host = urlparse(url).netloc
+        if self.breaker is None:
+            return self._send_once(method, url, host, kwargs)
+
+        attempt = 0
+        while True:
+            # host dato per morto: errore immediato invece di un altro timeout
+            self.breaker.before_request(host)
+            try:
+                response = self._send_once(method, url, host, kwargs)
+            except Exception as e:
+                if self.budget is not None and self.budget.expired():
+                    # timeout ridotto dalla scadenza: non è colpa dell'host
+                    raise TimeBudgetExceeded(str(e)) from e
+                backoff = self.breaker.on_failure(host, e, attempt, method)
+                if backoff is None:
+                    raise
+                time.sleep(backoff)
+                attempt += 1
+                continue
+            self.breaker.on_success(host)
+            return response
+
+    def _send_once(self, method: str, url: str, host: str, kwargs: Dict) -> requests.Response:
+        # turno dell'host (solo richieste reali: le risposte in cache non aspettano)
+        if self.scheduler is not None:
+            max_wait = self.budget.remaining() if self.budget is not None else None
+            if self.scheduler.wait(host, max_wait) is None:
+                raise TimeBudgetExceeded(f"Turno per {host} oltre il tempo massimo dell'analisi")
+        params = dict(kwargs)
+        params.setdefault('timeout', self.timeout)
+        if self.budget is not None:
+            self.budget.check()
+            params['timeout'] = self.budget.clamp(params['timeout'])
+        max_bytes = params.pop('max_bytes', None)
+        content_types = params.pop('content_types', None)
+        if max_bytes or content_types:
+            request = partial(self._download, method, url, params, max_bytes, content_types)
+        else:
+            request = partial(self.session.request, method, url, **params)
+
+        if self.concurrency is None:
+            # limite per host valido anche tra chiamate concorrenti di thread diversi
+            with self._host_slot(host):
+                return request()
+
+        token = self.concurrency.acquire(host)
+        start = time.monotonic()
+        outcome = None
+        try:
+            response = request()
+            outcome = response.status_code
+            return response
+        except Exception as e:
+            outcome = e
+            raise
+        finally:
+            self.concurrency.release(host, token, time.monotonic() - start, outcome)
+
+    def _download(self, method: str, url: str, params: Dict, max_bytes: Optional[int],
+                  content_types: Optional[Sequence[str]]) -> requests.Response:
+        """Risposta con il corpo letto in streaming: vuoto se il Content-Type non è tra
+        `content_types` (response.body_skipped), al massimo `max_bytes` byte
+        (response.truncated). La connessione viene chiusa senza leggere il resto."""
+        response = self.session.request(method, url, stream=True, **params)
+        response.body_skipped = False
+        response.truncated = False
+        try:
+            content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+            if content_types and content_type and not content_type.startswith(tuple(content_types)):
+                response.body_skipped = True
+                response._content = b''
+                return response
+
+            body = bytearray()
+            for chunk in response.iter_content(_DOWNLOAD_CHUNK_SIZE):
+                body += chunk
+                if max_bytes and len(body) > max_bytes:
+                    response.truncated = True
+                    del body[max_bytes:]
+                    break
+            response._content = bytes(body)
+            if not response.truncated:
+                # letta per intero: può entrare nella cache su disco
+                adapter = self.session.get_adapter(response.url)
+                if hasattr(adapter, 'store_streamed'):
+                    adapter.store_streamed(response)
+            return response
+        finally:
+            response._content_consumed = True
+            response.close()
+
+    def _host_slot(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = self._host_slots[host] = threading.BoundedSemaphore(self.per_host)
+            return slot
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,231 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, Optional
+
+from requests.adapters import HTTPAdapter
+
+# cache HTTP persistente tra analisi ("" la disattiva), dimensione massima in MB
+HTTP_CACHE_DIR = os.environ.get("SEO_HTTP_CACHE_DIR", ".http_cache")
+HTTP_CACHE_MAX_MB = float(os.environ.get("SEO_HTTP_CACHE_MB", "256"))
+
+# header che descrivono il corpo: quelli del 304 non valgono per la copia su disco
+_BODY_HEADERS = frozenset(['content-length', 'content-encoding', 'transfer-encoding'])
+
+
+class DiskHTTPCache:
+    """Corpi e validatori (ETag / Last-Modified) delle risposte GET su disco.
+
+    Ogni URL ha due file: <hash>.json con stato, header e validatori e
+    <hash>.body con il contenuto. La data di modifica dei file segna l'ultimo
+    uso: oltre `max_bytes` vengono eliminate le voci usate meno di recente (LRU).
+    """
+
+    def __init__(self, directory: str = HTTP_CACHE_DIR,
+                 max_bytes: int = int(HTTP_CACHE_MAX_MB * 1024 * 1024)):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0  # 304 serviti dal disco
+        self.misses = 0  # risposte scaricate per intero
+        self.stores = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._sizes: Dict[str, int] = {}
+        for name in os.listdir(directory):
+            key, ext = os.path.splitext(name)
+            if ext in ('.json', '.body'):
+                try:
+                    size = os.path.getsize(os.path.join(directory, name))
+                except OSError:
+                    continue
+                self._sizes[key] = self._sizes.get(key, 0) + size
+        self._total = sum(self._sizes.values())
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _paths(self, key: str):
+        base = os.path.join(self.directory, key)
+        return base + '.json', base + '.body'
+
+    def load(self, url: str) -> Optional[Dict]:
+        """Voce in cache per l'URL (metadati + corpo) oppure None"""
+        meta_path, body_path = self._paths(self._key(url))
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                entry = json.load(f)
+            with open(body_path, 'rb') as f:
+                entry['body'] = f.read()
+        except (OSError, ValueError):
+            return None
+        if entry.get('url') != url:
+            return None
+        return entry
+
+    def hit(self, url: str) -> None:
+        """Risposta servita dal disco: la voce diventa la più recente"""
+        for path in self._paths(self._key(url)):
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+        with self._lock:
+            self.hits += 1
+
+    def miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+    def store(self, url: str, response) -> None:
+        key = self._key(url)
+        meta = {
+            'url': url,
+            'status_code': response.status_code,
+            'reason': response.reason,
+            'encoding': response.encoding,
+            'headers': dict(response.headers),
+        }
+        body = response.content or b''
+        meta_bytes = json.dumps(meta).encode('utf-8')
+        meta_path, body_path = self._paths(key)
+
+        with self._lock:
+            try:
+                # prima il corpo, poi i metadati: una voce senza .json non viene letta
+                for path, data in ((body_path, body), (meta_path, meta_bytes)):
+                    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                    with open(tmp_path, 'wb') as f:
+                        f.write(data)
+                    os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"⚠️ Cache HTTP non scrivibile: {e}")
+                return
+            self._total += len(body) + len(meta_bytes) - self._sizes.get(key, 0)
+            self._sizes[key] = len(body) + len(meta_bytes)
+            self.stores += 1
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        # riporta la cache al 90% del limite eliminando le voci meno usate
+        target = self.max_bytes * 0.9
+
+        def last_used(key):
+            try:
+                return os.path.getmtime(self._paths(key)[0])
+            except OSError:
+                return 0
+
+        for key in sorted(self._sizes, key=last_used):
+            if self._total <= target:
+                break
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._total -= self._sizes.pop(key)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'stores': self.stores,
+                    'entries': len(self._sizes), 'bytes': self._total}
+
+
+class CachingHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter con GET condizionali: invia If-None-Match / If-Modified-Since e,
+    se il server risponde 304, restituisce la risposta salvata su disco.
+
+    Con stream=True il corpo lo legge il chiamante: la risposta viene salvata
+    solo se poi chiama store_streamed() dopo averla letta per intero."""
+
+    def __init__(self, disk_cache: DiskHTTPCache, **kwargs):
+        self.cache = disk_cache
+        super().__init__(**kwargs)
+
+    def send(self, request, stream=False, **kwargs):
+        # solo GET completi: HEAD e Range vanno diretti
+        if request.method != 'GET' or 'Range' in request.headers:
+            return super().send(request, stream=stream, **kwargs)
+
+        # i redirect copiano gli header della richiesta precedente: i validatori
+        # vanno ricalcolati per l'URL effettivo
+        request.headers.pop('If-None-Match', None)
+        request.headers.pop('If-Modified-Since', None)
+
+        entry = self.cache.load(request.url)
+        if entry is not None:
+            headers = entry['headers']
+            if headers.get('ETag'):
+                request.headers['If-None-Match'] = headers['ETag']
+            if headers.get('Last-Modified'):
+                request.headers['If-Modified-Since'] = headers['Last-Modified']
+
+        response = super().send(request, stream=stream, **kwargs)
+
+        if response.status_code == 304 and entry is not None:
+            # contenuto invariato: risposta salvata con gli header aggiornati dal 304
+            self.cache.hit(request.url)
+            # il corpo del 304 (vuoto) non verrà letto: la connessione torna subito al pool
+            try:
+                response.raw.drain_conn()
+                response.raw.release_conn()
+            except Exception:
+                pass
+            cached_headers = dict(entry['headers'])
+            cached_headers.update((name, value) for name, value in response.headers.items()
+                                  if name.lower() not in _BODY_HEADERS)
+            response.status_code = entry['status_code']
+            response.reason = entry['reason']
+            response.headers.clear()
+            response.headers.update(cached_headers)
+            response.encoding = entry['encoding']
+            response._content = entry['body']
+            response._content_consumed = True
+            response.from_cache = True
+            return response
+
+        self.cache.miss()
+        if response.status_code == 200 and self._cacheable(response):
+            if stream:
+                response.cache_pending = True
+            else:
+                self.cache.store(request.url, response)
+        return response
+
+    def store_streamed(self, response) -> None:
+        """Salva una risposta in streaming dopo che il chiamante l'ha letta tutta"""
+        if getattr(response, 'cache_pending', False):
+            response.cache_pending = False
+            self.cache.store(response.request.url, response)
+
+    @staticmethod
+    def _cacheable(response) -> bool:
+        headers = response.headers
+        if 'no-store' in headers.get('Cache-Control', '').lower():
+            return False
+        return bool(headers.get('ETag') or headers.get('Last-Modified'))
+
+
+_shared_caches: Dict[str, DiskHTTPCache] = {}
+_shared_lock = threading.Lock()
+
+
+def create_http_cache(directory: str = HTTP_CACHE_DIR) -> Optional[DiskHTTPCache]:
+    """Cache su disco condivisa nel processo (una per cartella), oppure None se
+    disattivata o la cartella non è scrivibile"""
+    if not directory:
+        return None
+    directory = os.path.abspath(directory)
+    with _shared_lock:
+        cache = _shared_caches.get(directory)
+        if cache is None:
+            try:
+                cache = _shared_caches[directory] = DiskHTTPCache(directory)
+            except OSError as e:
+                print(f"⚠️ Cache HTTP disattivata: {e}")
+                return None
+        return cache
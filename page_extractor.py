@@ -0,0 +1,520 @@
+import json
+import os
+from typing import Dict, List, Optional, Union
+
+from bs4 import BeautifulSoup
+from bs4.dammit import UnicodeDammit
+from bs4.element import CData, NavigableString, Tag
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # backend opzionale
+    LexborHTMLParser = None
+
+# backend di parsing: 'html.parser' | 'lxml' | 'selectolax' (configurabile da ambiente)
+PARSER_BACKEND = os.environ.get("SEO_PARSER_BACKEND", "lxml")
+
+# pagine renderizzate: 'browser' estrae i nodi con uno script nel browser,
+# 'source' scarica driver.page_source e lo passa al backend di parsing
+RENDER_EXTRACT = os.environ.get("SEO_RENDER_EXTRACT", "browser")
+
+# tag esclusi dal calcolo del contenuto testuale (come la vecchia "clean_soup")
+TEXT_EXCLUDED_TAGS = frozenset(["script", "style", "nav", "header", "footer", "noscript"])
+
+# classi CSS usate come heading alternativi (Elementor, Flazio, temi WordPress)
+HEADING_CSS_CLASSES = (
+    'elementor-heading-title',
+    'page-title', 'entry-title', 'post-title', 'main-title',
+    'h2', 'heading-2', 'subtitle', 'section-title',
+    'h3', 'heading-3', 'subsection-title',
+)
+
+# id dei contenitori in cui le SPA (React/Vue/Next/Nuxt) montano il contenuto
+SPA_ROOT_IDS = frozenset(['root', 'app', '__next', '__nuxt', 'svelte'])
+
+_HEADING_LEVELS = {f'h{level}': level for level in range(1, 7)}
+
+# antenati considerati nel contesto di un elemento (classi/id dei wrapper CMS)
+CONTEXT_ANCESTOR_LEVELS = 5
+
+# tag i cui testi BeautifulSoup non considera contenuto (Script, Stylesheet, ...)
+_NON_CONTENT_STRING_TAGS = frozenset(['script', 'style', 'template', 'rt', 'rp'])
+
+# attributi che BeautifulSoup restituisce come lista di valori
+_MULTI_VALUED_ATTRIBUTES = frozenset(
+    ['class', 'rel', 'rev', 'accept-charset', 'headers', 'accesskey', 'dropzone']
+)
+
+
+class PageNodes:
+    """Elementi SEO-rilevanti di una pagina, raccolti in una sola visita del DOM"""
+
+    def __init__(self):
+        self.title: Optional[Tag] = None
+        self.metas: List[Tag] = []
+        self.links: List[Tag] = []
+        self.anchors: List[Tag] = []  # solo <a> con attributo href
+        self.images: List[Tag] = []
+        self.headings: Dict[int, List[Tag]] = {level: [] for level in range(1, 7)}
+        self.css_classes: Dict[str, List[Tag]] = {cls: [] for cls in HEADING_CSS_CLASSES}
+        self.scripts: List[Tag] = []
+        self.spa_roots: List[Tag] = []
+        self.paragraphs = 0
+        self.text_parts: List[str] = []
+        self.contexts = ContextIndex()
+
+    def select(self, selector: str) -> List[Tag]:
+        """Equivalente di soup.select('.classe') per le classi in HEADING_CSS_CLASSES"""
+        return self.css_classes.get(selector.lstrip('.'), [])
+
+    def first_meta(self, attr: str, value: str) -> Optional[Tag]:
+        """Equivalente di soup.find('meta', attrs={attr: value})"""
+        for meta in self.metas:
+            if meta.get(attr) == value:
+                return meta
+        return None
+
+    @property
+    def text_content(self) -> str:
+        return ' '.join(' '.join(self.text_parts).split())
+
+    @property
+    def is_empty(self) -> bool:
+        """Pagina senza contenuto visibile (tipico HTML statico di siti JS)"""
+        return (len(self.text_content) < 50 and not self.paragraphs and
+                not self.images and not self.headings[1] and not self.headings[2])
+
+
+class ContextIndex:
+    """Contesto (tag, classi, id) di un elemento e dei suoi antenati, per un documento.
+
+    I token di ogni antenato sono calcolati una volta e condivisi da tutti i
+    discendenti: in una galleria con centinaia di <img> gli stessi wrapper
+    non vengono riletti e ricomposti per ogni immagine.
+    """
+
+    def __init__(self, levels: int = CONTEXT_ANCESTOR_LEVELS):
+        self.levels = levels
+        self._chains: Dict[tuple, str] = {}  # (id nodo, livelli) → contesto della catena
+        self._contexts: Dict[int, tuple] = {}  # id elemento → (contesto, contesto minuscolo)
+
+    def context(self, element) -> str:
+        """Classi e id dell'elemento, poi tag, classi e id dei suoi antenati"""
+        return self._lookup(element)[0]
+
+    def lower(self, element) -> str:
+        return self._lookup(element)[1]
+
+    def _lookup(self, element) -> tuple:
+        key = id(element)
+        entry = self._contexts.get(key)
+        if entry is None:
+            context = self._join(self._tokens(element, with_name=False),
+                                 self._chain(element.parent, self.levels))
+            entry = self._contexts[key] = (context, context.lower())
+        return entry
+
+    def _chain(self, node, levels: int) -> str:
+        if not node or levels <= 0:
+            return ''
+        key = (id(node), levels)
+        chain = self._chains.get(key)
+        if chain is None:
+            parent = getattr(node, 'parent', None)
+            chain = self._chains[key] = self._join(self._tokens(node, with_name=True),
+                                                   self._chain(parent, levels - 1))
+        return chain
+
+    @staticmethod
+    def _tokens(node, with_name: bool) -> str:
+        attrs = getattr(node, 'attrs', None) or {}
+        parts = [node.name] if with_name and node.name else []
+        classes = attrs.get('class')
+        if classes:
+            parts.extend(classes)
+        node_id = attrs.get('id')
+        if node_id:
+            parts.append(str(node_id))
+        return ' '.join(parts)
+
+    @staticmethod
+    def _join(head: str, tail: str) -> str:
+        return f"{head} {tail}" if head and tail else head or tail
+
+
+class PageExtractor:
+    """Visita il DOM una volta sola e raccoglie tutto ciò che serve a _analyze_page.
+
+    Sostituisce il secondo parsing di str(soup) per il testo pulito e le tante
+    find_all('a' | 'meta' | 'link' | 'img' | 'hN') ripetute per ogni campo.
+    """
+
+    def walk(self, soup: BeautifulSoup) -> PageNodes:
+        nodes = PageNodes()
+        string_types = getattr(soup, 'interesting_string_types', None) or {NavigableString, CData}
+
+        # visita in profondità iterativa (niente ricorsione su DOM molto annidati);
+        # il flag indica se il nodo sta dentro uno dei TEXT_EXCLUDED_TAGS
+        stack = [(child, False) for child in reversed(soup.contents)]
+        while stack:
+            node, excluded = stack.pop()
+
+            if not isinstance(node, Tag):
+                if not excluded and type(node) in string_types:
+                    nodes.text_parts.append(node)
+                continue
+
+            self._collect(node, nodes)
+
+            if node.contents:
+                child_excluded = excluded or node.name in TEXT_EXCLUDED_TAGS
+                stack.extend((child, child_excluded) for child in reversed(node.contents))
+
+        return nodes
+
+    def _collect(self, tag: Tag, nodes: PageNodes) -> None:
+        name = tag.name
+        if name == 'meta':
+            nodes.metas.append(tag)
+        elif name == 'link':
+            nodes.links.append(tag)
+        elif name == 'a':
+            if tag.get('href') is not None:
+                nodes.anchors.append(tag)
+        elif name == 'img':
+            nodes.images.append(tag)
+        elif name == 'title':
+            if nodes.title is None:
+                nodes.title = tag
+        elif name in _HEADING_LEVELS:
+            nodes.headings[_HEADING_LEVELS[name]].append(tag)
+        elif name == 'p':
+            nodes.paragraphs += 1
+        elif name == 'script':
+            nodes.scripts.append(tag)
+
+        if tag.get('id') in SPA_ROOT_IDS:
+            nodes.spa_roots.append(tag)
+
+        classes = tag.get('class')
+        if classes:
+            if isinstance(classes, str):
+                classes = classes.split()
+            for cls in set(classes):
+                matches = nodes.css_classes.get(cls)
+                if matches is not None:
+                    matches.append(tag)
+
+
+# =========================================================
+# BACKEND DI PARSING
+# =========================================================
+class Bs4Backend:
+    """BeautifulSoup con il tree builder indicato ('html.parser' puro Python o 'lxml')"""
+
+    def __init__(self, features: str = 'html.parser'):
+        self.name = features
+        self.features = features
+        self.extractor = PageExtractor()
+
+    def parse(self, markup: Union[str, bytes]) -> BeautifulSoup:
+        return BeautifulSoup(markup, self.features)
+
+    def extract(self, markup: Union[str, bytes]) -> PageNodes:
+        return self.extractor.walk(self.parse(markup))
+
+
+class LexborElement:
+    """Nodo selectolax/lexbor con la parte di API bs4 Tag usata dall'analyzer"""
+
+    __slots__ = ('node', 'name', 'attrs', '_tree')
+
+    def __init__(self, node, tree: "LexborTree"):
+        self.node = node
+        self.name = node.tag
+        self._tree = tree
+        attrs = {}
+        for key, value in node.attributes.items():
+            value = '' if value is None else value
+            attrs[key] = value.split() if key in _MULTI_VALUED_ATTRIBUTES else value
+        self.attrs = attrs
+
+    def get(self, key, default=None):
+        return self.attrs.get(key, default)
+
+    @property
+    def parent(self):
+        return self._tree.wrap(self.node.parent)
+
+    def get_text(self, separator: str = '', strip: bool = False) -> str:
+        parts = []
+        for text in self._tree.strings(self.node):
+            if strip:
+                text = text.strip()
+                if not text:
+                    continue
+            parts.append(text)
+        return separator.join(parts)
+
+
+class DocumentRoot:
+    """Radice del documento: come BeautifulSoup ha name '[document]' e nessun attributo"""
+
+    name = '[document]'
+    parent = None
+    attrs: Dict = {}
+
+    def get(self, key, default=None):
+        return default
+
+
+class LexborTree:
+    """Albero lexbor: un solo wrapper per nodo, così le identità restano stabili"""
+
+    def __init__(self, parser):
+        self.parser = parser
+        self.document = DocumentRoot()
+        self._elements: Dict[int, LexborElement] = {}
+
+    def wrap(self, node):
+        if node is None or node.tag == '-document':
+            return self.document if node is not None else None
+        element = self._elements.get(node.mem_id)
+        if element is None:
+            element = self._elements[node.mem_id] = LexborElement(node, self)
+        return element
+
+    def strings(self, node):
+        """Testi di contenuto sotto `node` in ordine di documento (come Tag.get_text)"""
+        stack = [node.child] if node.child is not None else []
+        while stack:
+            current = stack.pop()
+            if current.next is not None:
+                stack.append(current.next)
+            tag = current.tag
+            if tag == '-text':
+                yield current.text_content or ''
+            elif tag[0] != '-' and tag not in _NON_CONTENT_STRING_TAGS:
+                if current.child is not None:
+                    stack.append(current.child)
+
+
+class SelectolaxBackend:
+    """Parser C lexbor (pacchetto opzionale selectolax)"""
+
+    name = 'selectolax'
+
+    def __init__(self):
+        if LexborHTMLParser is None:
+            raise ImportError("selectolax non installato")
+        self.extractor = PageExtractor()
+
+    def parse(self, markup: Union[str, bytes]) -> LexborTree:
+        if isinstance(markup, bytes):
+            # stessa rilevazione di encoding di BeautifulSoup (BOM, meta charset, ...)
+            markup = UnicodeDammit(markup, is_html=True).unicode_markup or ''
+        return LexborTree(LexborHTMLParser(markup))
+
+    def extract(self, markup: Union[str, bytes]) -> PageNodes:
+        tree = self.parse(markup)
+        nodes = PageNodes()
+        root = tree.parser.root
+        if root is None:
+            return nodes
+
+        # stessa visita di PageExtractor.walk, sui nodi lexbor
+        stack = [(root, False)]
+        while stack:
+            node, excluded = stack.pop()
+            if node.next is not None:
+                stack.append((node.next, excluded))
+
+            tag = node.tag
+            if tag == '-text':
+                if not excluded:
+                    nodes.text_parts.append(node.text_content or '')
+                continue
+            if tag[0] == '-':
+                continue
+
+            self.extractor._collect(tree.wrap(node), nodes)
+            if node.child is not None:
+                child_excluded = (excluded or tag in TEXT_EXCLUDED_TAGS or
+                                  tag in _NON_CONTENT_STRING_TAGS)
+                stack.append((node.child, child_excluded))
+
+        return nodes
+
+
+# Visita il DOM renderizzato come PageExtractor.walk e restituisce in JSON solo i
+# nodi che servono all'analyzer: [tag, attributi, indice del padre, raccolto, testi].
+# Gli antenati di immagini e heading (contesto header/footer/nav) hanno solo classi
+# e id; i testi (come get_text) solo per title, heading e classi CSS heading.
+BROWSER_EXTRACT_JS = """
+var COLLECT = {meta: 1, link: 1, a: 1, img: 1, title: 1,
+               h1: 1, h2: 1, h3: 1, h4: 1, h5: 1, h6: 1};
+var WITH_TEXT = {title: 1, h1: 1, h2: 1, h3: 1, h4: 1, h5: 1, h6: 1};
+var CONTEXT = {img: 1, h1: 1, h2: 1, h3: 1, h4: 1, h5: 1, h6: 1};
+var HEADING_CLASSES = arguments[0], TEXT_EXCLUDED = arguments[1], NO_TEXT = arguments[2];
+var ATTRS = ['name', 'property', 'content', 'rel', 'href', 'src', 'alt', 'title',
+             'class', 'id', 'data-level'];
+var out = [], linked = [], index = new Map(), text = [], paragraphs = 0;
+
+function lower(el) { return (el.localName || el.nodeName).toLowerCase(); }
+function attrs(el, names) {
+    var result = {};
+    for (var i = 0; i < names.length; i++) {
+        var value = el.getAttribute(names[i]);
+        if (value !== null) { result[names[i]] = value; }
+    }
+    return result;
+}
+function textOf(el) {
+    var parts = [];
+    (function visit(node) {
+        var children = node.childNodes;
+        for (var i = 0; i < children.length; i++) {
+            var child = children[i];
+            if (child.nodeType === 3) { parts.push(child.data); }
+            else if (child.nodeType === 1 && !NO_TEXT[lower(child)]) { visit(child); }
+        }
+    })(el);
+    return parts;
+}
+// indice del nodo, con la catena dei suoi antenati; un nodo raccolto senza
+// contesto (link, meta) riceve la sua catena quando diventa antenato di un altro
+function ref(el) {
+    var i = index.get(el);
+    if (i === undefined) {
+        i = out.length;
+        index.set(el, i);
+        out.push([lower(el), attrs(el, ['class', 'id']), -1, 0, 0]);
+    }
+    if (!linked[i]) {
+        linked[i] = true;
+        var parent = el.parentNode;
+        out[i][2] = parent && parent.nodeType === 1 ? ref(parent) : -1;
+    }
+    return i;
+}
+function hasHeadingClass(el) {
+    var cls = el.getAttribute('class');
+    if (!cls) { return false; }
+    var names = cls.split(/\\s+/);
+    for (var i = 0; i < names.length; i++) {
+        if (HEADING_CLASSES[names[i]]) { return true; }
+    }
+    return false;
+}
+
+var stack = [[document.documentElement, false]];
+while (stack.length) {
+    var item = stack.pop(), node = item[0], excluded = item[1];
+    if (!node) { continue; }
+    if (node.nodeType === 3) {
+        if (!excluded) { text.push(node.data); }
+        continue;
+    }
+    if (node.nodeType !== 1) { continue; }
+    var name = lower(node);
+    if (name === 'p') { paragraphs++; }
+    var collect = COLLECT[name] && (name !== 'a' || node.hasAttribute('href'));
+    var classed = hasHeadingClass(node);
+    if (collect || classed) {
+        index.set(node, out.length);
+        out.push([name, attrs(node, ATTRS), -1, 1,
+                  WITH_TEXT[name] || classed ? textOf(node) : 0]);
+        // i link e i meta non usano il contesto: antenati solo se servono (ref)
+        if (CONTEXT[name] || classed) { ref(node); }
+    }
+    var children = node.childNodes, childExcluded = excluded || !!TEXT_EXCLUDED[name];
+    for (var i = children.length - 1; i >= 0; i--) {
+        stack.push([children[i], childExcluded]);
+    }
+}
+// gli spazi ripetuti vengono comunque compressi da PageNodes.text_content
+text = text.join(' ').replace(/[ \\t\\n\\r\\f]+/g, ' ');
+return JSON.stringify({nodes: out, text: text, paragraphs: paragraphs});
+"""
+
+
+class JsonElement:
+    """Nodo restituito da BROWSER_EXTRACT_JS con la parte di API bs4 Tag usata dall'analyzer"""
+
+    __slots__ = ('name', 'attrs', 'parent', '_texts')
+
+    def __init__(self, name: str, attrs: Dict, parent, texts: Optional[List[str]]):
+        self.name = name
+        self.attrs = {
+            key: value.split() if key in _MULTI_VALUED_ATTRIBUTES else value
+            for key, value in attrs.items()
+        }
+        self.parent = parent
+        self._texts = texts or []
+
+    def get(self, key, default=None):
+        return self.attrs.get(key, default)
+
+    def get_text(self, separator: str = '', strip: bool = False) -> str:
+        if strip:
+            return separator.join(t.strip() for t in self._texts if t.strip())
+        return separator.join(self._texts)
+
+
+class BrowserBackend:
+    """Estrazione nel browser: una sola chiamata di script al posto di page_source.
+
+    Il DOM renderizzato non attraversa il protocollo WebDriver né viene
+    riparsato in Python: lo script restituisce un JSON compatto con i nodi
+    raccolti, trasformato negli stessi PageNodes degli altri backend.
+    Script e root SPA servono solo sull'HTML statico e non vengono raccolti.
+    """
+
+    name = 'browser'
+
+    def __init__(self):
+        self.extractor = PageExtractor()
+        self._arguments = (
+            dict.fromkeys(HEADING_CSS_CLASSES, 1),
+            dict.fromkeys(TEXT_EXCLUDED_TAGS, 1),
+            dict.fromkeys(_NON_CONTENT_STRING_TAGS | {'noscript'}, 1),
+        )
+
+    def extract(self, driver) -> PageNodes:
+        return self.nodes_from(driver.execute_script(BROWSER_EXTRACT_JS, *self._arguments))
+
+    def nodes_from(self, payload: Union[str, Dict]) -> PageNodes:
+        if isinstance(payload, str):
+            payload = json.loads(payload)
+        nodes = PageNodes()
+        document = DocumentRoot()
+        entries = payload['nodes']
+        elements = [JsonElement(name, attrs, document, texts)
+                    for name, attrs, _, _, texts in entries]
+        for element, (_, _, parent, collected, _) in zip(elements, entries):
+            # un link raccolto può ricevere il padre dopo i suoi discendenti
+            if parent >= 0:
+                element.parent = elements[parent]
+            if collected:
+                self.extractor._collect(element, nodes)
+        nodes.paragraphs = payload.get('paragraphs', 0)
+        nodes.text_parts = [payload.get('text', '')]
+        return nodes
+
+
+def get_parser_backend(name: Optional[str] = None):
+    """Backend di parsing per nome, con fallback a lxml / html.parser se non installati"""
+    name = (name or PARSER_BACKEND).lower()
+    if name == 'selectolax':
+        try:
+            return SelectolaxBackend()
+        except ImportError:
+            print("⚠️ selectolax non installato, uso lxml")
+            name = 'lxml'
+    if name == 'lxml':
+        try:
+            import lxml  # noqa: F401
+            return Bs4Backend('lxml')
+        except ImportError:
+            print("⚠️ lxml non installato, uso html.parser")
+    return Bs4Backend('html.parser')
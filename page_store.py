@@ -0,0 +1,99 @@
+import copy
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+# archivio dei risultati per pagina tra un'analisi e l'altra ("" lo disattiva)
+PAGE_STORE_DIR = os.environ.get("SEO_PAGE_STORE_DIR", ".page_store")
+
+# da incrementare quando cambia il formato dei risultati di _analyze_page
+PAGE_STORE_VERSION = 1
+
+
+class PageStore:
+    """Ultimo risultato di _analyze_page per URL, con <lastmod> e hash dell'HTML.
+
+    Un file JSON per dominio (come AnalyticsStorage), caricato al primo uso e
+    riscritto da save() solo se modificato. Una pagina con lo stesso lastmod e
+    lo stesso contenuto statico viene riusata invece di essere rianalizzata.
+    """
+
+    def __init__(self, directory: str = PAGE_STORE_DIR):
+        self.directory = directory
+        self._domains: Dict[str, Dict[str, Dict]] = {}
+        self._dirty = set()
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, domain: str) -> str:
+        safe = ''.join(c if c.isalnum() or c in '.-' else '_' for c in domain)
+        return os.path.join(self.directory, f"{safe}.json")
+
+    def _pages(self, url: str) -> Dict[str, Dict]:
+        # chiamato con il lock acquisito
+        domain = urlparse(url).netloc.lower()
+        pages = self._domains.get(domain)
+        if pages is None:
+            pages = {}
+            try:
+                with open(self._path(domain), encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == PAGE_STORE_VERSION:
+                    pages = data.get('pages', {})
+            except (OSError, ValueError, AttributeError):
+                pass
+            self._domains[domain] = pages
+        return pages
+
+    def get(self, url: str, lastmod: Optional[str], content_hash: str,
+            fingerprint: str) -> Optional[Dict]:
+        """Risultato salvato se lastmod, hash del contenuto e configurazione coincidono"""
+        with self._lock:
+            entry = self._pages(url).get(url)
+        if (entry and entry.get('lastmod') == lastmod and
+                entry.get('content_hash') == content_hash and
+                entry.get('fingerprint') == fingerprint):
+            return copy.deepcopy(entry['result'])
+        return None
+
+    def put(self, url: str, lastmod: Optional[str], content_hash: str,
+            fingerprint: str, result: Dict) -> None:
+        with self._lock:
+            self._pages(url)[url] = {
+                'lastmod': lastmod,
+                'content_hash': content_hash,
+                'fingerprint': fingerprint,
+                'stored_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                'result': copy.deepcopy(result),
+            }
+            self._dirty.add(urlparse(url).netloc.lower())
+
+    def save(self) -> None:
+        """Scrive i domini modificati (file temporaneo + rename, mai a metà)"""
+        with self._lock:
+            dirty = {domain: self._domains[domain] for domain in self._dirty}
+            self._dirty.clear()
+            for domain, pages in dirty.items():
+                path = self._path(domain)
+                tmp_path = f"{path}.tmp"
+                try:
+                    with open(tmp_path, 'w', encoding='utf-8') as f:
+                        json.dump({'version': PAGE_STORE_VERSION, 'pages': pages},
+                                  f, ensure_ascii=False)
+                    os.replace(tmp_path, path)
+                except (OSError, TypeError, ValueError) as e:
+                    print(f"⚠️ Archivio pagine non salvato per {domain}: {e}")
+
+
+def create_page_store(directory: str = PAGE_STORE_DIR) -> Optional[PageStore]:
+    """Archivio pagine, oppure None se disattivato o la cartella non è scrivibile"""
+    if not directory:
+        return None
+    try:
+        return PageStore(directory)
+    except OSError as e:
+        print(f"⚠️ Archivio pagine disattivato: {e}")
+        return None
@@ -0,0 +1,98 @@
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+# pausa minima tra richieste allo stesso host se robots.txt non indica Crawl-delay
+DEFAULT_CRAWL_DELAY = float(os.environ.get("SEO_CRAWL_DELAY", "0.1"))
+# richieste consecutive concesse senza pausa con il ritmo di default
+DEFAULT_BURST = 4
+# Crawl-delay dichiarati oltre questo valore vengono ridotti (un audit non può durare ore)
+CRAWL_DELAY_MAX = float(os.environ.get("SEO_CRAWL_DELAY_MAX", "10"))
+
+
+class TokenBucket:
+    """Secchiello di token: `rate` richieste al secondo con raffiche fino a `burst`.
+
+    reserve() prenota sempre il prossimo token e restituisce quanto aspettare:
+    i token possono andare in negativo, così chi attende ottiene turni distinti.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def cancel(self) -> None:
+        """Restituisce un token prenotato e non usato"""
+        self.tokens = min(self.burst, self.tokens + 1)
+
+    def reserve(self) -> float:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class HostScheduler:
+    """Cortesia per host: ogni host ha il suo secchiello di token.
+
+    Con il Crawl-delay di robots.txt l'host riceve al massimo una richiesta ogni
+    `delay` secondi (senza raffiche); gli altri host usano `default_delay`.
+    L'attesa blocca solo le richieste verso quell'host: host diversi procedono
+    in parallelo.
+    """
+
+    def __init__(self, default_delay: float = DEFAULT_CRAWL_DELAY,
+                 burst: int = DEFAULT_BURST, max_delay: float = CRAWL_DELAY_MAX):
+        self.default_delay = max(0.0, default_delay)
+        self.burst = max(1, burst)
+        self.max_delay = max_delay
+        self._delays: Dict[str, float] = {}  # host → Crawl-delay da robots.txt
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._waited: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def set_crawl_delay(self, host: str, delay: Optional[float]) -> None:
+        host = host.lower()
+        with self._lock:
+            if delay is None or delay <= 0:
+                self._delays.pop(host, None)
+            else:
+                self._delays[host] = min(delay, self.max_delay)
+            self._buckets.pop(host, None)
+
+    def delay(self, host: str) -> float:
+        return self._delays.get(host.lower(), self.default_delay)
+
+    def wait(self, host: str, max_wait: Optional[float] = None) -> Optional[float]:
+        """Attende il turno per una richiesta all'host; restituisce i secondi attesi,
+        oppure None senza attendere se il turno arriverebbe dopo `max_wait` secondi"""
+        host = host.lower()
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                delay = self._delays.get(host, self.default_delay)
+                if delay <= 0:
+                    return 0.0
+                burst = 1 if host in self._delays else self.burst
+                bucket = self._buckets[host] = TokenBucket(1 / delay, burst)
+            pause = bucket.reserve()
+            if max_wait is not None and pause > max_wait:
+                bucket.cancel()
+                return None
+            if pause:
+                self._waited[host] = self._waited.get(host, 0.0) + pause
+        if pause:
+            time.sleep(pause)
+        return pause
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'default_delay': self.default_delay,
+                'crawl_delays': dict(self._delays),
+                'waited_seconds': {host: round(s, 2) for host, s in self._waited.items()},
+            }
@@ -0,0 +1,170 @@
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote, urlparse
+
+# product token con cui il crawl cerca il proprio gruppo in robots.txt (es. "SEOAnalyzer");
+# "*" = solo le regole generiche. Lo user-agent HTTP completo non conta (RFC 9309)
+ROBOTS_TOKEN = os.environ.get("SEO_ROBOTS_TOKEN", "*")
+
+# esiti memorizzati per gruppo (molte pagine condividono gli stessi path)
+_MATCH_CACHE_SIZE = 4096
+
+_TOKEN_RE = re.compile(r'[a-z_-]+')
+_ESCAPE_RE = re.compile(r'%([0-9A-Fa-f]{2})')
+_UNRESERVED = frozenset('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~')
+# caratteri ASCII lasciati come sono ('*' e '$' servono ai pattern, '%' agli escape)
+_PATH_SAFE = "/?#[]@!$&'()*+,;=:%-._~"
+
+
+def product_token(user_agent: str) -> str:
+    """Product token di uno user-agent, minuscolo: "Googlebot/2.1 (+http://...)"
+    → "googlebot"; "*" resta "*" """
+    user_agent = user_agent.strip().lower()
+    if user_agent.startswith('*'):
+        return '*'
+    match = _TOKEN_RE.match(user_agent)
+    return match.group(0) if match else ''
+
+
+def normalize_path(path: str) -> str:
+    """Path in forma confrontabile (RFC 9309 §2.2.2): caratteri non ASCII codificati
+    in UTF-8 con escape, escape in maiuscolo, escape dei caratteri non riservati
+    decodificati. "/caffè" e "/caff%c3%a8" diventano entrambi "/caff%C3%A8"."""
+    def escape(match):
+        char = chr(int(match.group(1), 16))
+        return char if char in _UNRESERVED else '%' + match.group(1).upper()
+
+    return quote(_ESCAPE_RE.sub(escape, path), safe=_PATH_SAFE)
+
+
+class RuleGroup:
+    """Regole Allow/Disallow di un gruppo User-agent, compilate.
+
+    Vale la regola più lunga che corrisponde al path (a parità di lunghezza
+    vince Allow), come per Googlebot e RFC 9309. Le regole senza `*` e `$`
+    sono semplici confronti di prefisso, le altre diventano regex ancorate.
+    Le regole sono ordinate per lunghezza: ci si ferma alla prima che
+    corrisponde, e gli esiti per path restano in cache. Regole e path vanno
+    confrontati nella forma di normalize_path().
+    """
+
+    def __init__(self, rules: List[Tuple[bool, str]]):
+        compiled = []
+        for allow, pattern in rules:
+            if not pattern:
+                continue  # "Disallow:" vuoto non blocca niente
+            pattern = normalize_path(pattern)
+            if '*' in pattern or pattern.endswith('$'):
+                matcher = self._compile(pattern).match
+                compiled.append((len(pattern), allow, None, matcher))
+            else:
+                compiled.append((len(pattern), allow, pattern, None))
+        # più lunghe prima, a parità Allow (True) prima di Disallow
+        compiled.sort(key=lambda rule: (-rule[0], not rule[1]))
+        self._rules = compiled
+        self._cache: Dict[str, bool] = {}
+
+    @staticmethod
+    def _compile(pattern: str):
+        anchored = pattern.endswith('$')
+        if anchored:
+            pattern = pattern[:-1]
+        regex = '.*'.join(re.escape(part) for part in pattern.split('*'))
+        return re.compile(regex + ('$' if anchored else ''), re.DOTALL)
+
+    def is_allowed(self, path: str) -> bool:
+        allowed = self._cache.get(path)
+        if allowed is None:
+            allowed = True
+            for _, allow, prefix, matcher in self._rules:
+                if (path.startswith(prefix) if prefix is not None else matcher(path)):
+                    allowed = allow
+                    break
+            if len(self._cache) >= _MATCH_CACHE_SIZE:
+                self._cache.clear()
+            self._cache[path] = allowed
+        return allowed
+
+
+class RobotsRules:
+    """robots.txt compilato: gruppi per user-agent, Crawl-delay e Sitemap.
+
+    `user_agent` è lo user-agent usato per default da is_allowed(): come da
+    RFC 9309 conta solo il suo product token ("Googlebot/2.1" → "googlebot"),
+    che deve coincidere con quello di una riga User-agent (senza distinzione di
+    maiuscole), altrimenti vale "*"; più gruppi con lo stesso nome si sommano.
+    """
+
+    def __init__(self, text: str = '', user_agent: str = '*'):
+        self.user_agent = user_agent
+        self.sitemaps: List[str] = []
+        self._rules: Dict[str, List[Tuple[bool, str]]] = {}
+        self._delays: Dict[str, float] = {}
+        self._groups: Dict[str, RuleGroup] = {}
+        self._parse(text)
+
+    def _parse(self, text: str) -> None:
+        agents: List[str] = []
+        in_rules = False
+        for line in text.splitlines():
+            line = line.split('#', 1)[0].strip()
+            if ':' not in line:
+                continue
+            field, value = (part.strip() for part in line.split(':', 1))
+            field = field.lower()
+            if field == 'user-agent':
+                # più righe User-agent consecutive formano un solo gruppo
+                if in_rules:
+                    agents = []
+                    in_rules = False
+                agent = product_token(value)
+                if not agent:
+                    continue
+                agents.append(agent)
+                self._rules.setdefault(agent, [])
+            elif field == 'sitemap':
+                # "Sitemap:" vale per tutto il file, anche dentro un gruppo
+                if value and value not in self.sitemaps:
+                    self.sitemaps.append(value)
+            elif field in ('allow', 'disallow'):
+                in_rules = True
+                for agent in agents:
+                    self._rules[agent].append((field == 'allow', value))
+            elif field == 'crawl-delay':
+                in_rules = True
+                try:
+                    delay = float(value)
+                except ValueError:
+                    continue
+                for agent in agents:
+                    self._delays[agent] = delay
+
+    @property
+    def user_agents(self) -> List[str]:
+        return list(self._rules)
+
+    def _agent(self, user_agent: Optional[str]) -> Optional[str]:
+        token = product_token(user_agent or self.user_agent)
+        if token != '*' and token in self._rules:
+            return token
+        return '*' if '*' in self._rules else None
+
+    def group(self, user_agent: Optional[str] = None) -> RuleGroup:
+        agent = self._agent(user_agent)
+        group = self._groups.get(agent)
+        if group is None:
+            group = self._groups[agent] = RuleGroup(self._rules.get(agent, []))
+        return group
+
+    def is_allowed(self, url: str, user_agent: Optional[str] = None) -> bool:
+        parsed = urlparse(url)
+        path = parsed.path or '/'
+        if path == '/robots.txt':
+            return True
+        if parsed.query:
+            path = f"{path}?{parsed.query}"
+        return self.group(user_agent).is_allowed(normalize_path(path))
+
+    def crawl_delay(self, user_agent: Optional[str] = None) -> Optional[float]:
+        return self._delays.get(self._agent(user_agent))
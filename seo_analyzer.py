@@ -1,79 +1,181 @@
 import requests
 from bs4 import BeautifulSoup
-import xml.etree.ElementTree as ET
-from urllib.parse import urljoin, urlparse, urlunparse
+from urllib.parse import urljoin, urlparse
 import time
 import re
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 import trafilatura
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import shutil
 import os
-
-# Selenium per rendering JS (Flazio & co.)
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
+import hashlib
+import threading
+
+from circuit_breaker import CircuitBreaker, HostUnreachable
+from concurrency import AdaptiveConcurrency
+from crawler import CRAWL_MAX_DEPTH, DEFAULT_MAX_PAGES, SiteCrawler
+from fetcher import AsyncFetcher, HTML_CONTENT_TYPES, PAGE_MAX_BYTES, ResponseCache
+from http_cache import CachingHTTPAdapter, create_http_cache
+from page_extractor import (
+    RENDER_EXTRACT, BrowserBackend, ContextIndex, PageNodes, get_parser_backend
+)
+from page_store import create_page_store
+from politeness import HostScheduler
+from robots_rules import ROBOTS_TOKEN, RobotsRules
+from time_budget import ANALYSIS_TIME_BUDGET, TimeBudget, TimeBudgetExceeded
+from sitemap_parser import (
+    SITEMAP_CHUNK_SIZE, SitemapStreamParser, decompress_prefix, is_nested_sitemap
+)
+from url_normalizer import UrlTable
+from browser_pool import (
+    BrowserPool, DEFAULT_POOL_SIZE, RENDER_MAX_WAIT, RENDER_PAGE_TIMEOUT, RENDER_QUIET_MS,
+    USER_AGENT, driver_responsive, is_browser_failure, is_page_timeout, wait_for_render
+)
 
 
 class SEOAnalyzer:
-    def __init__(self):
+    # marcatori di CMS/framework che iniettano il contenuto solo via JS
+    JS_SITE_MARKERS = ['flazio', 'wix.com', 'squarespace', 'webflow']
+
+    # verifica delle sitemap "indovinate": solo i primi byte e timeout breve
+    SITEMAP_PROBE_BYTES = 4096
+    SITEMAP_PROBE_TIMEOUT = 5
+    # indici di sitemap: download paralleli per livello e profondità massima
+    SITEMAP_WORKERS = 8
+    SITEMAP_MAX_DEPTH = 4
+    # download delle pagine: in streaming, limitato in byte e solo se HTML
+    PAGE_DOWNLOAD = {'max_bytes': PAGE_MAX_BYTES, 'content_types': HTML_CONTENT_TYPES}
+    # user-agent con cui il report valuta robots.txt (il crawl usa il proprio)
+    REPORT_USER_AGENT = 'Googlebot'
+    # URL in sitemap bloccati da robots.txt elencati uno per uno nel report
+    BLOCKED_URLS_LISTED = 20
+    # render interrotto da un browser in crash o terminato: riprova su un Chromium nuovo
+    RENDER_ATTEMPTS = 2
+
+    # pagine escluse dall'analisi (policy, termini, ecc.)
+    EXCLUDED_URL_PATTERNS = (
+        'privacy-policy', 'cookie-policy', 'terms-and-conditions',
+        'condizioni', 'termini', 'policy', 'legal'
+    )
+
+    def __init__(self, browser_pool_size: int = DEFAULT_POOL_SIZE,
+                 max_pages: int = DEFAULT_MAX_PAGES, crawl_max_depth: int = CRAWL_MAX_DEPTH,
+                 time_budget: Optional[float] = ANALYSIS_TIME_BUDGET):
         # ============= SELENIUM SETUP =============
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument(
-            "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        )
-
-        self.driver = None
-        try:
-            # Modalità Cloud (es. Streamlit)
-            chrome_options.binary_location = "/usr/bin/chromium"
-            service = Service("/usr/bin/chromedriver")
-            self.driver = webdriver.Chrome(service=service, options=chrome_options)
-            print("✅ Selenium avviato (Cloud Mode)")
-        except Exception:
-            try:
-                # Fallback locale
-                chrome_options.binary_location = ""
-                service = Service(ChromeDriverManager().install())
-                self.driver = webdriver.Chrome(service=service, options=chrome_options)
-                print("✅ Selenium avviato (Local Mode)")
-            except Exception as e:
-                print(f"❌ Errore Selenium: {e}")
-                self.driver = None
+        # pool condiviso di processo: Chromium parte solo al primo render necessario
+        self.browser_pool = BrowserPool.shared(browser_pool_size).retain()
+        self._closed = False
 
         # ============= REQUESTS SESSION =============
         self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
-                          'AppleWebKit/537.36 (KHTML, like Gecko) '
-                          'Chrome/91.0.4472.124 Safari/537.36'
-        })
-        self.max_pages = 50
+        self.session.headers.update({'User-Agent': USER_AGENT})
+        self.max_pages = max_pages
+        # crawl del sito quando le sitemap non bastano: livelli di link seguiti dalla home
+        self.crawl_max_depth = crawl_max_depth
+        self.crawl_stats: Dict[str, int] = {}
         self.timeout = 20  # aumentato per rendering JS
+        # richieste HTTP in parallelo (limiti globali e per host) sulla stessa sessione
+        # cache delle risposte per tutta l'analisi: robots.txt e sitemap scaricati una volta
+        self.response_cache = ResponseCache()
+        # cortesia per host: Crawl-delay di robots.txt o pausa di default, host in parallelo
+        self.scheduler = HostScheduler()
+        self._robots_rules: Dict[str, RobotsRules] = {}  # origine → robots.txt compilato
+        # richieste in parallelo per host adattate a latenza, timeout e 429/5xx
+        self.concurrency = AdaptiveConcurrency()
+        # host morti o che non rispondono: tentativi limitati, poi richieste saltate
+        self.breaker = CircuitBreaker()
+        # scadenza dell'intera analisi (parte ora): oltre, risultati sulle pagine già viste
+        self.budget = TimeBudget(time_budget)
+        self.partial = False
+        self.unvisited_urls = 0
+        # cache su disco tra analisi: GET condizionali, i 304 arrivano dal disco
+        self.http_cache = create_http_cache()
+        fetcher_options = {
+            'timeout': self.timeout,
+            'cache': self.response_cache,
+            'scheduler': self.scheduler,
+            'concurrency': self.concurrency,
+            'breaker': self.breaker,
+            'budget': self.budget,
+        }
+        if self.http_cache is not None:
+            self._http_cache_start = self.http_cache.stats()
+            fetcher_options.update(adapter_class=CachingHTTPAdapter, disk_cache=self.http_cache)
+        self.fetcher = AsyncFetcher(self.session, **fetcher_options)
+        self._favicon_cache: Dict[str, bool] = {}  # host → favicon.ico presente
+        # URL estratti dalle sitemap: le sitemap vengono lette in streaming una sola volta
+        self._sitemap_pages: Dict[tuple, List[str]] = {}
+        # ID interi per gli URL dell'analisi: varianti dello stesso URL sono una pagina
+        self.url_table = UrlTable()
+        self.sitemap_lastmod: Dict[int, Optional[str]] = {}  # ID pagina → <lastmod>
+        # risultati delle analisi precedenti: pagine invariate non vengono rianalizzate
+        self.page_store = create_page_store()
+        self.page_store_stats = {'reused': 0, 'analyzed': 0}
+        self._page_store_lock = threading.Lock()  # contatori aggiornati dai worker
+        # backend di parsing pagine: 'html.parser' | 'lxml' | 'selectolax'
+        self.parser_backend = get_parser_backend()
+        self.render_max_wait = RENDER_MAX_WAIT
+        self.render_quiet_ms = RENDER_QUIET_MS
+        # pagine renderizzate: 'browser' (script nel browser) | 'source' (page_source)
+        self.render_extract = RENDER_EXTRACT
+        self.browser_backend = BrowserBackend()
+        # 'hybrid': HTML statico e Selenium solo se serve | 'always' | 'never'
+        self.render_mode = 'hybrid'
+        self._site_render_mode: Dict[str, str] = {}  # dominio → 'static' | 'js'
+
+    def budget_status(self) -> Dict[str, Any]:
+        """Esito rispetto al tempo massimo: analisi parziale e URL rimasti da visitare"""
+        return {
+            'partial': self.partial,
+            'unvisited_urls': self.unvisited_urls,
+            'time_budget': self.budget.seconds,
+            'elapsed': round(self.budget.elapsed(), 1),
+        }
+
+    def http_cache_stats(self) -> Dict[str, int]:
+        """Statistiche della cache su disco per questa analisi (304 serviti, scaricati, salvati)"""
+        if self.http_cache is None:
+            return {}
+        stats = self.http_cache.stats()
+        for key in ('hits', 'misses', 'stores'):
+            stats[key] -= self._http_cache_start[key]
+        return stats
+
+    def close(self):
+        """Rilascia il pool di browser condiviso e il motore HTTP"""
+        if getattr(self, '_closed', True):
+            return
+        self._closed = True
+        self.browser_pool.release_ref()
+        if hasattr(self, 'fetcher'):
+            self.fetcher.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
 
     def __del__(self):
-        if hasattr(self, 'driver') and self.driver:
-            try:
-                self.driver.quit()
-            except Exception:
-                pass
+        self.close()
 
     # =========================================================
     # SITEMAP & ROBOTS
     # =========================================================
     def get_sitemap_urls(self, base_url: str) -> List[str]:
         """Trova e analizza tutte le sitemap del sito, incluse quelle nidificate"""
-        found_sitemaps = []
         domain = urlparse(base_url).netloc
         base_clean = f"https://{domain}" if not base_url.startswith('http') else base_url.rstrip('/')
 
+        # Sitemap dichiarate in robots.txt: se valide sono quelle ufficiali
+        # e non serve provare i percorsi comuni
+        declared = self._robots_sitemap_urls(base_clean)
+        if declared:
+            found_sitemaps = self._probe_sitemaps(declared)
+            if found_sitemaps:
+                return found_sitemaps
+
         sitemap_locations = [
             f"{base_clean}/sitemap.xml",
             f"{base_clean}/sitemap_index.xml",
@@ -85,100 +187,233 @@ class SEOAnalyzer:
             f"{base_clean}/sitemap_products.xml"
         ]
 
-        # Cerca sitemap in robots.txt
-        try:
-            robots_url = f"{base_clean}/robots.txt"
-            response = self.session.get(robots_url, timeout=self.timeout)
-            if response.status_code == 200:
-                for line in response.text.split('\n'):
-                    if line.strip().lower().startswith('sitemap:'):
-                        sitemap_url = line.split(':', 1)[1].strip()
-                        if sitemap_url.endswith('.xml'):
-                            sitemap_locations.append(sitemap_url)
-        except Exception:
-            pass
-
-        # Valida le sitemap candidate
-        for sitemap_url in sitemap_locations:
+        return self._probe_sitemaps(sitemap_locations)
+
+    def _probe_sitemaps(self, sitemap_urls: List[str]) -> List[str]:
+        """Sitemap valide tra le candidate, in parallelo e scaricando solo l'inizio
+        del file (il download completo avviene poi in extract_urls_from_sitemaps).
+        Anche i server che ignorano Range e rispondono 200 con il file intero
+        vengono letti solo fino a SITEMAP_PROBE_BYTES."""
+        responses = self.fetcher.fetch_all(
+            sitemap_urls,
+            headers={'Range': f'bytes=0-{self.SITEMAP_PROBE_BYTES - 1}',
+                     'Accept-Encoding': 'identity'},
+            timeout=self.SITEMAP_PROBE_TIMEOUT,
+            max_bytes=self.SITEMAP_PROBE_BYTES
+        )
+        return [url for url, response in zip(sitemap_urls, responses)
+                if self._looks_like_sitemap(response)]
+
+    def robots_rules(self, url: str) -> RobotsRules:
+        """robots.txt compilato dell'host dell'URL (senza robots.txt è tutto consentito)"""
+        parsed = urlparse(url)
+        origin = f"{parsed.scheme}://{parsed.netloc}"
+        rules = self._robots_rules.get(origin)
+        if rules is None:
+            text = ''
             try:
-                response = self.session.get(sitemap_url, timeout=self.timeout)
+                response = self.fetcher.fetch(f"{origin}/robots.txt")
                 if response.status_code == 200:
-                    content = response.text.strip()
-                    if ('<?xml' in content and
-                            ('sitemap' in content.lower() or 'url>' in content.lower())):
-                        found_sitemaps.append(sitemap_url)
+                    text = response.text
             except Exception:
-                continue
-
-        return list(set(found_sitemaps))  # deduplica
+                pass
+            rules = self._robots_rules[origin] = RobotsRules(text, ROBOTS_TOKEN)
+        return rules
+
+    def is_allowed(self, url: str) -> bool:
+        """URL scaricabile secondo robots.txt per lo user-agent dell'analyzer"""
+        return self.robots_rules(url).is_allowed(url)
+
+    def _apply_crawl_delay(self, base_url: str) -> None:
+        """Crawl-delay di robots.txt nello scheduler (robots.txt è in cache per l'analisi)"""
+        self.scheduler.set_crawl_delay(urlparse(base_url).netloc,
+                                       self.robots_rules(base_url).crawl_delay())
+
+    def _robots_sitemap_urls(self, base_clean: str) -> List[str]:
+        """Sitemap XML dichiarate in robots.txt (righe "Sitemap:"), senza duplicati"""
+        self._apply_crawl_delay(base_clean)
+        return [url for url in self.robots_rules(base_clean).sitemaps
+                if url.endswith(('.xml', '.xml.gz'))]
+
+    def _looks_like_sitemap(self, response) -> bool:
+        """Risposta (completa o parziale con Range) che contiene una sitemap XML"""
+        if isinstance(response, Exception) or response.status_code not in (200, 206):
+            return False
+        content = decompress_prefix(response.content).decode('utf-8', errors='replace').strip()
+        return ('<?xml' in content and
+                ('sitemap' in content.lower() or 'url>' in content.lower()))
 
-    def _parse_sitemap(self, sitemap_content: str, base_url: str,
+    def _parse_sitemap(self, sitemap_content, base_url: str,
                        processed_sitemaps: set) -> List[str]:
         """Analizza il contenuto della sitemap XML e le sitemap nidificate"""
-        urls = []
-        try:
-            root = ET.fromstring(sitemap_content)
-
-            for url_elem in root.iter():
-                if url_elem.tag.endswith('}loc') or url_elem.tag == 'loc':
-                    if url_elem.text and url_elem.text.strip():
-                        url_text = url_elem.text.strip()
-
-                        # sitemap nidificata
-                        if url_text.endswith('.xml') and 'sitemap' in url_text.lower():
-                            if url_text not in processed_sitemaps:
-                                try:
-                                    processed_sitemaps.add(url_text)
-                                    response = self.session.get(url_text, timeout=self.timeout)
-                                    if response.status_code == 200:
-                                        nested_urls = self._parse_sitemap(
-                                            response.text, base_url, processed_sitemaps
-                                        )
-                                        urls.extend(nested_urls)
-                                except Exception:
-                                    continue
-                        else:
-                            urls.append(url_text)
-
-        except ET.ParseError:
-            # fallback: regex sui <loc>
-            url_pattern = r'<loc>(.*?)</loc>'
-            found_urls = re.findall(url_pattern, sitemap_content)
-            for url in found_urls:
-                if url and url.startswith('http'):
-                    if url.endswith('.xml') and 'sitemap' in url.lower():
-                        if url not in processed_sitemaps:
-                            try:
-                                processed_sitemaps.add(url)
-                                response = self.session.get(url, timeout=self.timeout)
-                                if response.status_code == 200:
-                                    nested_urls = self._parse_sitemap(
-                                        response.text, base_url, processed_sitemaps
-                                    )
-                                    urls.extend(nested_urls)
-                            except Exception:
-                                continue
-                    else:
-                        urls.append(url)
-
-        return urls
+        if isinstance(sitemap_content, str):
+            sitemap_content = sitemap_content.encode('utf-8')
+        # la sitemap già scaricata è la radice (chiave vuota) della visita
+        entries = {'': self._sitemap_entries([sitemap_content], None)}
+        return self._resolve_sitemaps([''], entries, None, processed_sitemaps, {})
+
+    def _sitemap_entries(self, chunks, limit: Optional[int]) -> List[tuple]:
+        """Voci di una sitemap letta a blocchi, in ordine: (True, sitemap nidificata, lastmod)
+        o (False, pagina, lastmod). Si ferma quando il file da solo ha dato `limit` pagine."""
+        parser = SitemapStreamParser()
+        entries = []
+        pages = set()
+
+        def add(locs) -> bool:
+            for loc, lastmod in locs:
+                if is_nested_sitemap(loc):
+                    entries.append((True, loc, lastmod))
+                else:
+                    entries.append((False, loc, lastmod))
+                    pages.add(loc)
+                    if limit is not None and len(pages) >= limit:
+                        return True
+            return False
 
-    def extract_urls_from_sitemaps(self, sitemap_urls: List[str]) -> List[str]:
-        """Estrae gli URL delle pagine dalle sitemap trovate"""
-        page_urls = set()
-        processed_sitemaps = set()
+        for chunk in chunks:
+            if add(parser.feed(chunk)) or self.budget.expired():
+                return entries
+        add(parser.close())
+        return entries
 
-        for sitemap_url in sitemap_urls:
-            try:
-                response = self.session.get(sitemap_url, timeout=self.timeout)
-                if response.status_code == 200:
-                    urls = self._parse_sitemap(response.text, "", processed_sitemaps)
-                    page_urls.update(urls)
-            except Exception as e:
-                print(f"Errore nell'analisi sitemap {sitemap_url}: {str(e)}")
-                continue
+    def _read_sitemap(self, sitemap_url: str, limit: Optional[int]) -> Optional[List[tuple]]:
+        """Scarica e analizza una sitemap in streaming (None se non disponibile)"""
+        try:
+            response = self.fetcher.fetch(sitemap_url, stream=True)
+        except Exception as e:
+            print(f"Errore nell'analisi sitemap {sitemap_url}: {str(e)}")
+            return None
+        try:
+            if response.status_code != 200:
+                return None
+            # da salvare nella cache su disco: i blocchi vengono tenuti finché la
+            # sitemap non è letta per intero
+            body = [] if getattr(response, 'cache_pending', False) else None
+            complete = []
+
+            def chunks():
+                for chunk in response.iter_content(SITEMAP_CHUNK_SIZE):
+                    if body is not None:
+                        body.append(chunk)
+                    yield chunk
+                complete.append(True)
+
+            entries = self._sitemap_entries(chunks(), limit)
+            if complete and body is not None:
+                response._content = b''.join(body)
+                response._content_consumed = True
+                adapter = self.session.get_adapter(response.url)
+                if hasattr(adapter, 'store_streamed'):
+                    adapter.store_streamed(response)
+            return entries
+        except Exception as e:
+            print(f"Errore nell'analisi sitemap {sitemap_url}: {str(e)}")
+            return None
+        finally:
+            # chiude la connessione anche se la sitemap non è stata letta tutta
+            response.close()
+
+    def _resolve_sitemaps(self, roots: List[str], entries: Dict[str, Optional[list]],
+                          limit: Optional[int], processed_sitemaps: set,
+                          lastmods: Dict[int, Optional[str]]) -> List[str]:
+        """Scarica le sitemap nidificate un livello alla volta, in parallelo.
+
+        `entries` contiene le sitemap già lette; `processed_sitemaps` quelle da non
+        riprendere (cicli tra indici); `lastmods` riceve il <lastmod> delle pagine.
+        Il risultato è lo stesso di una visita in profondità sequenziale: ogni
+        indice viene espanso nel punto in cui compare.
+        """
+        skip = set(processed_sitemaps)
+        processed_sitemaps.update(roots)
+        level = list(dict.fromkeys(roots))
+
+        with ThreadPoolExecutor(max_workers=self.SITEMAP_WORKERS) as pool:
+            for depth in range(self.SITEMAP_MAX_DEPTH + 1):
+                # a gruppi, nell'ordine di visita: con max_pages piccolo bastano i primi file
+                to_fetch = [url for url in level if url not in entries]
+                for start in range(0, max(len(to_fetch), 1), self.SITEMAP_WORKERS):
+                    batch = to_fetch[start:start + self.SITEMAP_WORKERS]
+                    entries.update(zip(batch, pool.map(
+                        lambda url: self._read_sitemap(url, limit), batch
+                    )))
+                    urls, complete = self._merge_sitemaps(roots, entries, limit, skip, lastmods)
+                    if complete:
+                        return urls
+                    if self.budget.expired():
+                        # tempo esaurito: le pagine trovate finora
+                        self.partial = True
+                        return self._merge_sitemaps(roots, entries, limit, skip, lastmods,
+                                                    final=True)[0]
+
+                # livello successivo: sitemap figlie non ancora viste, in ordine di apparizione
+                children = [loc for url in level for nested, loc, _ in entries.get(url) or ()
+                            if nested]
+                level = [loc for loc in dict.fromkeys(children) if loc not in processed_sitemaps]
+                if not level or depth == self.SITEMAP_MAX_DEPTH:
+                    break
+                processed_sitemaps.update(level)
+
+        # oltre la profondità massima le sitemap nidificate restano non lette
+        return self._merge_sitemaps(roots, entries, limit, skip, lastmods, final=True)[0]
+
+    def _merge_sitemaps(self, roots: List[str], entries: Dict[str, Optional[list]],
+                        limit: Optional[int], skip: set, lastmods: Dict[int, Optional[str]],
+                        final: bool = False) -> tuple:
+        """Unisce le pagine in ordine di visita in profondità. `complete` è False se la
+        visita si ferma su una sitemap non ancora scaricata prima di arrivare a `limit`
+        (con `final` le sitemap non scaricate valgono come vuote)."""
+        page_ids: Dict[int, None] = {}
+        expanded = set(skip)
+
+        def visit(sitemap_url: str) -> Optional[str]:
+            if sitemap_url not in entries:
+                return None if final else 'pending'
+            for nested, loc, lastmod in entries[sitemap_url] or ():
+                if nested:
+                    if loc not in expanded:
+                        expanded.add(loc)
+                        stop = visit(loc)
+                        if stop:
+                            return stop
+                else:
+                    url_id = self.url_table.intern(loc)
+                    if url_id not in page_ids:
+                        page_ids[url_id] = None
+                        lastmods[url_id] = lastmod
+                    if limit is not None and len(page_ids) >= limit:
+                        return 'limit'
+            return None
+
+        stop = None
+        for root in roots:
+            if root not in expanded:
+                expanded.add(root)
+                stop = visit(root)
+                if stop:
+                    break
+        return self.url_table.urls(page_ids), stop != 'pending'
 
-        return list(page_urls)[:self.max_pages]
+    def extract_urls_from_sitemaps(self, sitemap_urls: List[str]) -> List[str]:
+        """Estrae gli URL delle pagine dalle sitemap trovate (al massimo max_pages)"""
+        key = (tuple(sitemap_urls), self.max_pages)
+        if key not in self._sitemap_pages:
+            lastmods: Dict[int, Optional[str]] = {}
+            self._sitemap_pages[key] = self._resolve_sitemaps(
+                list(sitemap_urls), {}, self.max_pages, set(), lastmods
+            )[:self.max_pages]
+            # <lastmod> delle pagine: serve a riusare i risultati delle analisi precedenti
+            self.sitemap_lastmod.update(lastmods)
+        return list(self._sitemap_pages[key])
+
+    def all_sitemap_urls(self, sitemap_urls: List[str]) -> List[str]:
+        """Tutti gli URL delle pagine delle sitemap, senza il limite max_pages (si ferma
+        solo alla scadenza del tempo dell'analisi)"""
+        key = (tuple(sitemap_urls), None)
+        if key not in self._sitemap_pages:
+            self._sitemap_pages[key] = self._resolve_sitemaps(
+                list(sitemap_urls), {}, None, set(), {}
+            )
+        return list(self._sitemap_pages[key])
 
     def _parse_sitemap_for_pages(self, sitemap_content: str) -> List[str]:
         """Compatibilità vecchio metodo"""
@@ -193,12 +428,16 @@ class SEOAnalyzer:
             'allow_rules': [],
             'crawl_delay': None,
             'sitemap_urls': [],
-            'user_agents': []
+            'user_agents': [],
+            'homepage_blocked': False,
+            'blocked_sitemap_urls': [],
+            # True se non è stato possibile controllare tutte le pagine delle sitemap
+            'blocked_sitemap_sampled': False
         }
 
         try:
             robots_url = f"{base_url.rstrip('/')}/robots.txt"
-            response = self.session.get(robots_url, timeout=self.timeout)
+            response = self.fetcher.fetch(robots_url)
 
             if response.status_code == 200:
                 robots_data['found'] = True
@@ -233,7 +472,7 @@ class SEOAnalyzer:
                     elif low.startswith('crawl-delay:'):
                         delay = line.split(':', 1)[1].strip()
                         try:
-                            robots_data['crawl_delay'] = int(delay)
+                            robots_data['crawl_delay'] = float(delay)
                         except Exception:
                             pass
 
@@ -241,6 +480,26 @@ class SEOAnalyzer:
                         sitemap_url = line.split(':', 1)[1].strip()
                         robots_data['sitemap_urls'].append(sitemap_url)
 
+                # regole compilate: valutate come le valuta il motore di ricerca
+                rules = self.robots_rules(base_url)
+                robots_data['homepage_blocked'] = not rules.is_allowed(
+                    base_url, self.REPORT_USER_AGENT)
+                # tutte le pagine delle sitemap lette dall'analisi, non solo le max_pages
+                # scansionate; a tempo scaduto restano quelle già estratte
+                sampled = self.budget.expired()
+                if sampled:
+                    page_lists = list(self._sitemap_pages.values())
+                else:
+                    roots = dict.fromkeys(key[0] for key in self._sitemap_pages)
+                    page_lists = [self.all_sitemap_urls(list(urls)) for urls in roots]
+                    sampled = self.budget.expired()
+                sitemap_pages = dict.fromkeys(url for urls in page_lists for url in urls)
+                robots_data['blocked_sitemap_sampled'] = sampled
+                robots_data['blocked_sitemap_urls'] = [
+                    url for url in sitemap_pages
+                    if not self.robots_rules(url).is_allowed(url, self.REPORT_USER_AGENT)
+                ]
+
         except Exception:
             pass
 
@@ -251,170 +510,416 @@ class SEOAnalyzer:
     # =========================================================
     def scan_website_pages(self, base_url: str, sitemap_urls: List[str]) -> List[Dict]:
         """Scansiona le pagine del sito (con blacklist per privacy/cookie/termini)"""
-        pages_data = []
-        urls_to_scan = set()
+        # ID delle pagine (dict al posto di set: ordine deterministico); le varianti
+        # dello stesso URL (www, '/' finale, tracking) vengono scaricate una volta
+        urls_to_scan: Dict[int, None] = {}
+        # Crawl-delay del sito prima di crawl e scansione
+        self._apply_crawl_delay(base_url)
 
         # URL da sitemap
         if sitemap_urls:
             sitemap_page_urls = self.extract_urls_from_sitemaps(sitemap_urls)
-            urls_to_scan.update(sitemap_page_urls)
+            urls_to_scan.update(dict.fromkeys(map(self.url_table.intern, sitemap_page_urls)))
 
-        # fallback: scopri link dalla home
+        # fallback: crawl del sito a partire dalla home
         if len(urls_to_scan) < 5:
             discovered_urls = self._discover_urls(base_url)
-            urls_to_scan.update(discovered_urls)
+            urls_to_scan.update(dict.fromkeys(map(self.url_table.intern, discovered_urls)))
 
-        urls_to_scan.add(base_url)
+        urls_to_scan.setdefault(self.url_table.intern(base_url), None)
 
-        # blacklist URL da escludere (policy, termini, ecc.)
-        excluded_patterns = [
-            'privacy-policy', 'cookie-policy', 'terms-and-conditions',
-            'condizioni', 'termini', 'policy', 'legal'
-        ]
-        final_urls = []
-        for url in list(urls_to_scan)[:self.max_pages]:
-            if any(p in url.lower() for p in excluded_patterns):
-                continue
-            final_urls.append(url)
+        # blacklist URL da escludere (policy, termini, ecc.) e pagine vietate da robots.txt
+        final_urls = [url for url in self.url_table.urls(urls_to_scan)
+                      if not self._is_excluded_url(url) and self.is_allowed(url)][:self.max_pages]
 
-        for url in final_urls:
-            try:
-                page_data = self._analyze_page(url)
-                if page_data:
-                    pages_data.append(page_data)
-                time.sleep(1)  # un po' di respiro per Selenium
-            except Exception as e:
-                print(f"Errore nell'analisi di {url}: {str(e)}")
-                continue
+        # favicon.ico del sito verificata subito, non a tempo quasi scaduto
+        if final_urls:
+            self._has_favicon_from([], final_urls[0])
 
-        return pages_data
+        # 1) HTML statico di tutte le pagine in parallelo (motore HTTP su thread pool)
+        prefetched = self.fetcher.fetch_all(final_urls, **self.PAGE_DOWNLOAD)
 
-    def _discover_urls(self, base_url: str) -> List[str]:
-        """Scopre URL aggiuntivi esplorando il sito con requests"""
-        discovered_urls = set()
-        domain = urlparse(base_url).netloc
+        # 2) parsing + eventuale render JS sui Chromium del pool;
+        #    map() mantiene l'ordine di final_urls
+        workers = min(self.browser_pool.size, len(final_urls)) or 1
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(self._scan_page, final_urls, prefetched))
+        pages_data = [page_data for page_data in results if page_data]
 
+        if self.budget.expired():
+            # tempo esaurito: l'analisi prosegue sulle pagine raccolte finora
+            self.partial = True
+            self.unvisited_urls += len(results) - len(pages_data)
+
+        if self.page_store is not None:
+            self.page_store.save()
+        return pages_data
+
+    def _scan_page(self, url: str, prefetched=None) -> Dict:
+        """Analizza una pagina dentro un worker della scansione"""
         try:
-            response = self.session.get(base_url, timeout=self.timeout)
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-
-                for link in soup.find_all('a', href=True):
-                    href = link.get('href', '')
-                    if href:
-                        full_url = urljoin(base_url, href)
-                        if urlparse(full_url).netloc == domain:
-                            clean_url = urlunparse(
-                                urlparse(full_url)._replace(query='', fragment='')
-                            )
-                            discovered_urls.add(clean_url)
-                            if len(discovered_urls) >= 20:
-                                break
-        except Exception:
-            pass
+            return self._analyze_page(url, prefetched)
+        except TimeBudgetExceeded:
+            # pagina non visitata: conteggiata da scan_website_pages
+            return None
+        except Exception as e:
+            print(f"Errore nell'analisi di {url}: {str(e)}")
+            return None
 
-        return list(discovered_urls)
+    def _is_excluded_url(self, url: str) -> bool:
+        url = url.lower()
+        return any(p in url for p in self.EXCLUDED_URL_PATTERNS)
 
-    def _analyze_page(self, url: str) -> Dict:
-        """Analizza una singola pagina (render JS con Selenium se possibile)"""
+    def _discover_urls(self, base_url: str) -> List[str]:
+        """Scopre le pagine del sito con un crawl in ampiezza dalla home (stesso sito,
+        fino a crawl_max_depth livelli di link e max_pages pagine HTML)"""
+        crawler = SiteCrawler(self.fetcher, self._page_links,
+                              max_pages=self.max_pages, max_depth=self.crawl_max_depth,
+                              accept=lambda url: (not self._is_excluded_url(url) and
+                                                  self.is_allowed(url)),
+                              budget=self.budget)
+        try:
+            discovered_urls = crawler.crawl(base_url)
+        except Exception as e:
+            print(f"⚠️ Crawl del sito interrotto: {e}")
+            discovered_urls = []
+        self.crawl_stats = crawler.stats
+        if crawler.stats.get('partial'):
+            self.partial = True
+            self.unvisited_urls += crawler.stats['unvisited']
+        return discovered_urls
+
+    def _page_links(self, response) -> List[str]:
+        """href dei link <a> di una pagina scaricata (backend di parsing configurato)"""
+        nodes = self.parser_backend.extract(response.content)
+        return [a.get('href', '') for a in nodes.anchors if a.get('href')]
+
+    def _analyze_page(self, url: str, prefetched=None) -> Dict:
+        """Analizza una singola pagina: HTML statico, render JS con Selenium solo se serve.
+
+        `prefetched` è la risposta (o l'eccezione) già scaricata dal motore HTTP.
+        """
         start_time = time.time()
+        render_wait = 0.0
+        rendered = False
+        truncated = False
 
         try:
-            if self.driver:
-                # Selenium → render completo (Flazio & JS)
-                self.driver.get(url)
-                time.sleep(3)  # aspetta che Flazio inietti contenuti
-                page_source = self.driver.page_source
-                soup = BeautifulSoup(page_source, 'html.parser')
-                status_code = 200
-            else:
-                # Fallback solo HTML
-                response = self.session.get(url, timeout=self.timeout)
-                soup = BeautifulSoup(response.content, 'html.parser')
+            nodes = None
+            status_code = 0
+            content_hash = None
+            try:
+                if prefetched is None:
+                    response = self.fetcher.fetch(url, **self.PAGE_DOWNLOAD)
+                elif isinstance(prefetched, Exception):
+                    raise prefetched
+                else:
+                    response = prefetched
+                    # il download è avvenuto prima: conta il tempo di risposta del server
+                    start_time -= response.elapsed.total_seconds()
                 status_code = response.status_code
+                if getattr(response, 'body_skipped', False):
+                    # risorsa non HTML (PDF, immagine, video...): niente parsing né render
+                    return {
+                        'url': url,
+                        'status_code': status_code,
+                        'response_time': time.time() - start_time,
+                        'content_type': response.headers.get('Content-Type', ''),
+                        'non_html': True
+                    }
+                truncated = getattr(response, 'truncated', False)
+                content_hash = hashlib.sha256(response.content).hexdigest()
+                stored = self._stored_page(url, status_code, content_hash)
+                if stored is not None:
+                    # stesso lastmod e stesso HTML dell'ultima analisi: niente parsing né render
+                    stored.update(url=url, status_code=status_code,
+                                  response_time=time.time() - start_time)
+                    return stored
+                # un solo parsing e una sola visita del DOM per tutti i campi
+                nodes = self.parser_backend.extract(response.content)
+            except Exception as e:
+                # HTML statico non raggiungibile: proviamo comunque con il browser
+                static_error = e
+
+            if nodes is None and (self.breaker.is_open(urlparse(url).netloc) or
+                                  isinstance(static_error, TimeBudgetExceeded)):
+                # host che non risponde o tempo esaurito: niente render
+                raise static_error
+
+            if nodes is None or (self._needs_js_render(url, status_code, nodes) and
+                                 not self.budget.expired()):
+                render = self._render_page(url)
+                if render:
+                    js_nodes, render_wait = render
+                    if nodes is not None:
+                        self._learn_render_mode(url, nodes, js_nodes)
+                    nodes = js_nodes
+                    status_code = status_code or 200
+                    rendered = True
+                elif nodes is None:
+                    raise static_error
 
             response_time = time.time() - start_time
+            fields = self._extract_page_fields(nodes, url)
 
-            # Pulizia per calcolo contenuto testuale
-            clean_soup = BeautifulSoup(str(soup), 'html.parser')
-            for script in clean_soup(["script", "style", "nav", "header",
-                                      "footer", "noscript"]):
-                script.decompose()
-            text_content = clean_soup.get_text(separator=' ')
-            text_content = ' '.join(text_content.split())
-
-            return {
+            page_data = {
                 'url': url,
                 'status_code': status_code,
                 'response_time': response_time,
-                'title': self._extract_title(soup),
-                'meta_description': self._extract_meta_description(soup),
-                'headings': self._extract_headings(soup),
-                'images': self._extract_images(soup, url),
-                'content_length': len(text_content),
-                'text_content': text_content,
-                'internal_links': self._count_internal_links(soup, url),
-                'external_links': self._count_external_links(soup, url),
-                'canonical': self._get_canonical(soup),
-                'open_graph': self._get_open_graph(soup),
-                'twitter_cards': self._get_twitter_cards(soup),
-                'viewport': self._get_viewport(soup),
-                'has_favicon': self._has_favicon(soup, url)
+                **fields,
+                'rendered': rendered,
+                'render_wait': render_wait
             }
-
+            if truncated and not rendered:
+                # HTML oltre PAGE_MAX_BYTES: analizzata solo la parte scaricata
+                page_data['truncated'] = True
+            self._store_page(url, status_code, content_hash, page_data)
+            return page_data
+
+        except TimeBudgetExceeded:
+            raise
         except Exception as e:
-            return {
+            page_data = {
                 'url': url,
                 'status_code': 0,
                 'response_time': time.time() - start_time,
                 'error': str(e)
             }
+            if isinstance(e, HostUnreachable) or self.breaker.is_open(urlparse(url).netloc):
+                page_data['unreachable'] = True
+            return page_data
+
+    def _page_store_fingerprint(self) -> str:
+        # risultati prodotti con un'altra configurazione non vanno riusati
+        return f"{self.parser_backend.name}|{self.render_mode}|{self.render_extract}"
+
+    def _sitemap_lastmod(self, url: str) -> Optional[str]:
+        url_id = self.url_table.lookup(url)
+        return None if url_id is None else self.sitemap_lastmod.get(url_id)
+
+    def _stored_page(self, url: str, status_code: int, content_hash: str) -> Optional[Dict]:
+        """Risultato dell'analisi precedente se lastmod e contenuto sono invariati"""
+        if self.page_store is None or status_code != 200:
+            return None
+        lastmod = self._sitemap_lastmod(url)
+        stored = self.page_store.get(url, lastmod, content_hash, self._page_store_fingerprint())
+        if stored is not None and stored.get('rendered') and lastmod is None:
+            # render senza <lastmod>: le shell SPA/Flazio restano identiche mentre il
+            # contenuto iniettato via JS cambia, l'hash statico da solo non basta
+            return None
+        if stored is not None:
+            with self._page_store_lock:
+                self.page_store_stats['reused'] += 1
+        return stored
+
+    def _store_page(self, url: str, status_code: int, content_hash: Optional[str],
+                    page_data: Dict) -> None:
+        with self._page_store_lock:
+            self.page_store_stats['analyzed'] += 1
+        if self.page_store is None or status_code != 200 or not content_hash:
+            return
+        lastmod = self._sitemap_lastmod(url)
+        if page_data.get('rendered') and lastmod is None:
+            # non riusabile (vedi _stored_page): inutile salvarlo
+            return
+        self.page_store.put(url, lastmod, content_hash, self._page_store_fingerprint(),
+                            page_data)
+
+    def _render_page(self, url: str):
+        """Render completo con Selenium (Flazio & JS): (PageNodes, secondi di attesa)"""
+        for attempt in range(self.RENDER_ATTEMPTS):
+            with self.browser_pool.driver() as driver:
+                if not driver:
+                    return None
+                try:
+                    # anche il render è una visita al server: stesso turno delle richieste HTTP,
+                    # ma senza attendere oltre il tempo massimo dell'analisi
+                    if self.scheduler.wait(urlparse(url).netloc, self.budget.remaining()) is None:
+                        return None
+                    driver.set_page_load_timeout(self.budget.clamp(RENDER_PAGE_TIMEOUT))
+                    driver.get(url)
+                    # attesa adattiva: DOM pronto e senza mutazioni (Flazio inietta tardi)
+                    render_wait = wait_for_render(
+                        driver, self.budget.clamp(self.render_max_wait), self.render_quiet_ms
+                    )
+                    return self._rendered_nodes(driver, url), render_wait
+                except Exception as e:
+                    if self.budget.expired():
+                        # timeout dovuto al tempo massimo, non a un browser bloccato
+                        print(f"Render interrotto per tempo massimo {url}")
+                        return None
+                    if is_page_timeout(e):
+                        # pagina lenta: errore della pagina, senza un altro tentativo;
+                        # il driver resta nel pool solo se risponde ancora
+                        if not driver_responsive(driver):
+                            self.browser_pool.mark_broken(driver)
+                        print(f"Timeout rendering Selenium {url}: {str(e)}")
+                        return None
+                    if not is_browser_failure(e):
+                        print(f"Errore rendering Selenium {url}: {str(e)}")
+                        return None
+                    # renderer in crash o driver terminato: Chromium nuovo e un altro tentativo
+                    self.browser_pool.mark_broken(driver)
+                    print(f"Browser in crash su {url}: {str(e)}")
+            if self.budget.expired():
+                break
+        return None
+
+    def _rendered_nodes(self, driver, url: str) -> PageNodes:
+        """Nodi del DOM renderizzato: estratti nel browser, o da page_source come riserva"""
+        if self.render_extract == 'browser':
+            try:
+                return self.browser_backend.extract(driver)
+            except Exception as e:
+                if is_browser_failure(e) or is_page_timeout(e):
+                    raise
+                print(f"Estrazione nel browser non riuscita {url}: {str(e)}")
+        return self.parser_backend.extract(driver.page_source)
+
+    # =========================================================
+    # MODALITÀ IBRIDA (HTML statico → Selenium solo se serve)
+    # =========================================================
+    def _needs_js_render(self, url: str, status_code: int, nodes: PageNodes) -> bool:
+        """Decide se la pagina va renderizzata con il browser"""
+        if self.render_mode == 'never' or status_code != 200:
+            return False
+        if self.render_mode == 'always':
+            return True
+
+        # pagina vuota: va renderizzata anche se il sito è già classificato statico
+        if nodes.is_empty:
+            return True
+
+        domain = urlparse(url).netloc
+        decision = self._site_render_mode.get(domain)
+        if decision is not None:
+            return decision == 'js'
+
+        signals = self._js_render_signals(nodes)
+        if not signals:
+            # HTML statico completo: il resto del sito non passa dal browser
+            self._site_render_mode.setdefault(domain, 'static')
+        return bool(signals)
+
+    def _js_render_signals(self, nodes: PageNodes) -> List[str]:
+        """Indizi nell'HTML statico che il contenuto viene generato via JS"""
+        signals = []
+        if nodes.is_empty:
+            signals.append('empty-body')
+
+        # script/meta del CMS (es. asset serviti da flazio.com, generator Wix)
+        for tag in nodes.scripts + nodes.links + nodes.metas:
+            ref = str(tag.get('src') or tag.get('href') or tag.get('content') or '').lower()
+            if ref and any(marker in ref for marker in self.JS_SITE_MARKERS):
+                signals.append('cms-marker')
+                break
+
+        # root di una SPA (React/Vue/Next/Nuxt) vuoto nell'HTML statico
+        for root in nodes.spa_roots:
+            if not root.get_text(strip=True):
+                signals.append('spa-root')
+                break
+
+        if not self._title_from(nodes.title):
+            signals.append('missing-title')
+        if not nodes.headings[1]:
+            signals.append('missing-h1')
+        return signals
+
+    def _learn_render_mode(self, url: str, static_nodes: PageNodes,
+                           js_nodes: PageNodes) -> None:
+        """Confronta HTML statico e renderizzato e memorizza la scelta per il sito"""
+        domain = urlparse(url).netloc
+        if domain in self._site_render_mode:
+            return
+
+        signals = self._js_render_signals(static_nodes)
+        js_only = (
+            ('missing-title' in signals and self._title_from(js_nodes.title)) or
+            ('missing-h1' in signals and js_nodes.headings[1]) or
+            ('empty-body' in signals and not js_nodes.is_empty)
+        )
+        static_len = len(static_nodes.text_content)
+        js_len = len(js_nodes.text_content)
+        if js_len > static_len * 1.5 + 200:
+            js_only = True
+
+        mode = 'js' if (js_only or 'cms-marker' in signals or 'spa-root' in signals) else 'static'
+        self._site_render_mode.setdefault(domain, mode)
 
     # =========================================================
     # ESTRATTORI BASE
     # =========================================================
+    # I metodi _extract_*/_count_*/_get_* lavorano sulla soup (una find_all per campo);
+    # le varianti *_from ricevono gli elementi già raccolti dal backend di parsing.
+    def _extract_page_fields(self, nodes: PageNodes, page_url: str) -> Dict:
+        """Tutti i campi SEO della pagina dagli elementi raccolti dal backend di parsing"""
+        text_content = nodes.text_content
+        return {
+            'title': self._title_from(nodes.title),
+            'meta_description': self._meta_description_from(nodes.metas),
+            'headings': self._headings_from(
+                nodes.headings.get, nodes.select, nodes.first_meta('property', 'og:title'),
+                nodes.contexts
+            ),
+            'images': self._images_from(nodes.images, page_url, nodes.contexts),
+            'content_length': len(text_content),
+            'text_content': text_content,
+            'internal_links': self._count_internal_links_from(nodes.anchors, page_url),
+            'external_links': self._count_external_links_from(nodes.anchors, page_url),
+            'canonical': self._canonical_from(nodes.links),
+            'open_graph': self._open_graph_from(nodes.metas),
+            'twitter_cards': self._twitter_cards_from(nodes.metas),
+            'viewport': self._viewport_from(nodes.metas),
+            'has_favicon': self._has_favicon_from(nodes.links, page_url)
+        }
+
     def _extract_title(self, soup: BeautifulSoup) -> str:
-        title_tag = soup.find('title')
+        return self._title_from(soup.find('title'))
+
+    def _title_from(self, title_tag) -> str:
         return title_tag.get_text().strip() if title_tag else ""
 
     def _extract_meta_description(self, soup: BeautifulSoup) -> str:
-        # standard
-        meta_desc = soup.find('meta', attrs={'name': 'description'})
-        if meta_desc and meta_desc.get('content'):
-            content = str(meta_desc.get('content')).strip()
-            if content and len(content) > 10:
-                return content
-
-        # Open Graph
-        og_desc = soup.find('meta', attrs={'property': 'og:description'})
-        if og_desc and og_desc.get('content'):
-            content = str(og_desc.get('content')).strip()
-            if content and len(content) > 10:
-                return content
-
-        # Twitter
-        twitter_desc = soup.find('meta', attrs={'name': 'twitter:description'})
-        if twitter_desc and twitter_desc.get('content'):
-            content = str(twitter_desc.get('content')).strip()
-            if content and len(content) > 10:
-                return content
+        return self._meta_description_from(soup.find_all('meta'))
+
+    def _meta_description_from(self, metas: list) -> str:
+        # standard → Open Graph → Twitter (vale il primo meta di ciascun tipo)
+        for attr, value in (('name', 'description'),
+                            ('property', 'og:description'),
+                            ('name', 'twitter:description')):
+            meta = next((m for m in metas if m.get(attr) == value), None)
+            if meta and meta.get('content'):
+                content = str(meta.get('content')).strip()
+                if content and len(content) > 10:
+                    return content
 
         return ""
 
     def _extract_headings(self, soup: BeautifulSoup) -> Dict:
         """Estrae gli heading con logica avanzata per CMS"""
+        return self._headings_from(
+            lambda level: soup.find_all(f'h{level}'),
+            soup.select,
+            soup.find('meta', property='og:title')
+        )
+
+    def _headings_from(self, level_elements, select, og_title,
+                       contexts: Optional[ContextIndex] = None) -> Dict:
+        """Heading dai tag hN (level_elements), classi CSS (select) e og:title"""
+        contexts = contexts or ContextIndex()
         headings = {'h1': [], 'h2': [], 'h3': [], 'h4': [], 'h5': [], 'h6': []}
 
         for level in range(1, 7):
             heading_texts = []
             heading_elements = []
 
-            for heading in soup.find_all(f'h{level}'):
+            for heading in level_elements(level):
                 text = heading.get_text(strip=True)
                 if text:
                     if level == 1:
                         should_include = self._should_include_h1(
-                            heading, text, heading_elements
+                            heading, text, heading_elements, contexts
                         )
                         if should_include:
                             heading_texts.append(text)
@@ -427,7 +932,7 @@ class SEOAnalyzer:
 
         # H1 alternativi
         if not headings['h1']:
-            elementor_h1 = soup.select('.elementor-heading-title')
+            elementor_h1 = select('.elementor-heading-title')
             for elem in elementor_h1:
                 parent = elem.parent
                 if parent and ('h1' in str(parent.get('class', [])).lower() or
@@ -441,7 +946,7 @@ class SEOAnalyzer:
                 flazio_selectors = ['.page-title', '.entry-title',
                                     '.post-title', '.main-title']
                 for selector in flazio_selectors:
-                    elements = soup.select(selector)
+                    elements = select(selector)
                     for elem in elements:
                         text = elem.get_text(strip=True)
                         if text and 5 < len(text) < 300:
@@ -451,7 +956,6 @@ class SEOAnalyzer:
                         break
 
             if not headings['h1']:
-                og_title = soup.find('meta', property='og:title')
                 if og_title and og_title.get('content'):
                     og_content = str(og_title.get('content')).strip()
                     clean_title = (
@@ -467,7 +971,7 @@ class SEOAnalyzer:
 
         # H2 extra
         if len(headings['h2']) < 2:
-            elementor_h2 = soup.select('.elementor-heading-title')
+            elementor_h2 = select('.elementor-heading-title')
             for elem in elementor_h2:
                 parent = elem.parent
                 if parent and ('h2' in str(parent.get('class', [])).lower() or
@@ -478,7 +982,7 @@ class SEOAnalyzer:
 
             h2_selectors = ['.h2', '.heading-2', '.subtitle', '.section-title']
             for selector in h2_selectors:
-                elements = soup.select(selector)
+                elements = select(selector)
                 for elem in elements:
                     text = elem.get_text(strip=True)
                     if text and 3 < len(text) < 200:
@@ -486,7 +990,7 @@ class SEOAnalyzer:
 
         # H3 extra
         if len(headings['h3']) < 3:
-            elementor_h3 = soup.select('.elementor-heading-title')
+            elementor_h3 = select('.elementor-heading-title')
             for elem in elementor_h3:
                 parent = elem.parent
                 if parent and ('h3' in str(parent.get('class', [])).lower() or
@@ -497,7 +1001,7 @@ class SEOAnalyzer:
 
             h3_selectors = ['.h3', '.heading-3', '.subsection-title']
             for selector in h3_selectors:
-                elements = soup.select(selector)
+                elements = select(selector)
                 for elem in elements:
                     text = elem.get_text(strip=True)
                     if text and 3 < len(text) < 200:
@@ -506,19 +1010,20 @@ class SEOAnalyzer:
         return headings
 
     def _should_include_h1(self, heading_element, text: str,
-                           existing_elements: list) -> bool:
+                           existing_elements: list,
+                           contexts: Optional[ContextIndex] = None) -> bool:
         for existing_elem in existing_elements:
             existing_text = existing_elem.get_text(strip=True)
             if text == existing_text:
                 return False
 
-        parent_context = self._get_element_context(heading_element)
+        parent_context = (contexts or ContextIndex()).lower(heading_element)
 
         non_content_indicators = [
             'header', 'footer', 'sidebar', 'nav', 'menu',
             'widget', 'aside', 'navigation'
         ]
-        if any(ind in parent_context.lower() for ind in non_content_indicators):
+        if any(ind in parent_context for ind in non_content_indicators):
             return len(existing_elements) == 0
 
         wp_duplicate_classes = [
@@ -542,37 +1047,19 @@ class SEOAnalyzer:
 
         return False
 
-    def _get_element_context(self, element) -> str:
-        context_parts = []
-
-        if element.get('class'):
-            context_parts.extend(element.get('class', []))
-        if element.get('id'):
-            context_parts.append(str(element.get('id')))
-
-        current = element.parent
-        level = 0
-        while current and level < 5:
-            if hasattr(current, 'name') and current.name:
-                context_parts.append(current.name)
-            if hasattr(current, 'get'):
-                if current.get('class'):
-                    context_parts.extend(current.get('class', []))
-                if current.get('id'):
-                    context_parts.append(str(current.get('id')))
-            current = current.parent if hasattr(current, 'parent') else None
-            level += 1
-
-        return ' '.join(str(part) for part in context_parts)
-
     # =========================================================
     # IMMAGINI (con esclusione Flazio + header/footer + loghi)
     # =========================================================
     def _extract_images(self, soup: BeautifulSoup, page_url: str) -> List[Dict]:
         """Estrae info sulle immagini, ignorando asset di sistema Flazio/header/footer/loghi"""
+        return self._images_from(soup.find_all('img'), page_url)
+
+    def _images_from(self, img_elements: list, page_url: str,
+                     contexts: Optional[ContextIndex] = None) -> List[Dict]:
+        contexts = contexts or ContextIndex()
         images = []
 
-        for img in soup.find_all('img'):
+        for img in img_elements:
             src = img.get('src', '')
             alt = img.get('alt', '')
 
@@ -584,7 +1071,7 @@ class SEOAnalyzer:
             else:
                 full_src = str(src)
 
-            if not self._is_valid_content_image(img, full_src, alt):
+            if not self._is_valid_content_image(img, full_src, alt, contexts):
                 continue
 
             final_alt = str(alt) if alt else ''
@@ -601,7 +1088,8 @@ class SEOAnalyzer:
 
         return images
 
-    def _is_valid_content_image(self, img, src: str, alt: str) -> bool:
+    def _is_valid_content_image(self, img, src: str, alt: str,
+                                contexts: Optional[ContextIndex] = None) -> bool:
         """Determina se un'immagine è SEO-rilevante (ignora Flazio, header/footer, loghi, icone)"""
         if not src:
             return False
@@ -622,7 +1110,7 @@ class SEOAnalyzer:
             return False
 
         # 3) ignora immagini chiaramente di layout / non contenuto
-        context = self._get_element_context(img).lower()
+        context = (contexts or ContextIndex()).lower(img)
         context_exclude_tokens = [
             'header', 'footer', 'navbar', 'nav', 'menu',
             'logo', 'brand', 'social', 'icon', 'copyright'
@@ -652,9 +1140,12 @@ class SEOAnalyzer:
     # LINK / TAG VARI
     # =========================================================
     def _count_internal_links(self, soup: BeautifulSoup, page_url: str) -> int:
+        return self._count_internal_links_from(soup.find_all('a', href=True), page_url)
+
+    def _count_internal_links_from(self, anchors: list, page_url: str) -> int:
         domain = urlparse(page_url).netloc
         count = 0
-        for link in soup.find_all('a', href=True):
+        for link in anchors:
             href = link.get('href', '')
             if href:
                 full_url = urljoin(page_url, href)
@@ -663,9 +1154,12 @@ class SEOAnalyzer:
         return count
 
     def _count_external_links(self, soup: BeautifulSoup, page_url: str) -> int:
+        return self._count_external_links_from(soup.find_all('a', href=True), page_url)
+
+    def _count_external_links_from(self, anchors: list, page_url: str) -> int:
         domain = urlparse(page_url).netloc
         count = 0
-        for link in soup.find_all('a', href=True):
+        for link in anchors:
             href = link.get('href', '')
             if href and href.startswith('http'):
                 if urlparse(href).netloc != domain:
@@ -674,7 +1168,10 @@ class SEOAnalyzer:
 
     def _get_canonical(self, soup: BeautifulSoup) -> str:
         """Estrae il tag canonical in modo robusto (liste, maiuscole, spazi ecc.)"""
-        for link in soup.find_all('link'):
+        return self._canonical_from(soup.find_all('link'))
+
+    def _canonical_from(self, links: list) -> str:
+        for link in links:
             rel_attr = link.get('rel')
             if not rel_attr:
                 continue
@@ -692,8 +1189,11 @@ class SEOAnalyzer:
         return ""
 
     def _get_open_graph(self, soup: BeautifulSoup) -> Dict:
+        return self._open_graph_from(soup.find_all('meta'))
+
+    def _open_graph_from(self, metas: list) -> Dict:
         og_tags = {}
-        for meta in soup.find_all('meta'):
+        for meta in metas:
             prop = meta.get('property', '')
             if prop and prop.startswith('og:'):
                 content = meta.get('content', '')
@@ -702,8 +1202,11 @@ class SEOAnalyzer:
         return og_tags
 
     def _get_twitter_cards(self, soup: BeautifulSoup) -> Dict:
+        return self._twitter_cards_from(soup.find_all('meta'))
+
+    def _twitter_cards_from(self, metas: list) -> Dict:
         twitter_tags = {}
-        for meta in soup.find_all('meta'):
+        for meta in metas:
             name = meta.get('name', '')
             if name and name.startswith('twitter:'):
                 content = meta.get('content', '')
@@ -712,31 +1215,43 @@ class SEOAnalyzer:
         return twitter_tags
 
     def _get_viewport(self, soup: BeautifulSoup) -> str:
-        viewport = soup.find('meta', attrs={'name': 'viewport'})
+        return self._viewport_from(soup.find_all('meta'))
+
+    def _viewport_from(self, metas: list) -> str:
+        viewport = next((m for m in metas if m.get('name') == 'viewport'), None)
         if viewport and viewport.get('content'):
             return viewport.get('content')
         return ""
 
     def _has_favicon(self, soup: BeautifulSoup, page_url: str) -> bool:
-        for link in soup.find_all('link'):
+        return self._has_favicon_from(soup.find_all('link'), page_url)
+
+    def _has_favicon_from(self, links: list, page_url: str) -> bool:
+        for link in links:
             rel = link.get('rel', [])
             if isinstance(rel, str):
                 rel = [rel]
             if any('icon' in r.lower() for r in rel):
                 return True
 
-        try:
-            parsed = urlparse(page_url)
-            favicon_url = f"{parsed.scheme}://{parsed.netloc}/favicon.ico"
-            response = self.session.head(favicon_url, timeout=5)
-            return response.status_code == 200
-        except Exception:
-            return False
+        # /favicon.ico è unico per host: una sola HEAD per tutta la scansione
+        parsed = urlparse(page_url)
+        host = f"{parsed.scheme}://{parsed.netloc}"
+        if host not in self._favicon_cache:
+            try:
+                response = self.fetcher.fetch(f"{host}/favicon.ico", method='HEAD', timeout=5)
+                self._favicon_cache[host] = response.status_code == 200
+            except Exception:
+                self._favicon_cache[host] = False
+        return self._favicon_cache[host]
 
     # =========================================================
     # ANALISI SEO
     # =========================================================
     def analyze_seo_factors(self, pages_data: List[Dict], base_url: str) -> Dict:
+        # PDF, immagini ecc. contano solo per stato HTTP e dettaglio pagine
+        all_pages = pages_data
+        pages_data = [page for page in all_pages if not page.get('non_html')]
         if not pages_data:
             return self._empty_analysis()
 
@@ -750,14 +1265,14 @@ class SEOAnalyzer:
             'content_length': self._analyze_content_length(pages_data),
             'keyword_density': self._analyze_keyword_density(pages_data),
             'response_times': self._analyze_response_times(pages_data),
-            'status_codes': self._analyze_status_codes(pages_data),
+            'status_codes': self._analyze_status_codes(all_pages),
             'canonical_tags': self._analyze_canonical_tags(pages_data),
             'open_graph': self._analyze_open_graph_tags(pages_data),
             'twitter_cards': self._analyze_twitter_cards_tags(pages_data),
             'mobile_friendly': self._analyze_mobile_friendly(pages_data),
             'favicon': self._analyze_favicon(pages_data),
             'robots_txt': self._analyze_robots_txt_results(robots_analysis),
-            'page_details': self._create_page_details_table(pages_data)
+            'page_details': self._create_page_details_table(all_pages)
         }
 
     def _analyze_titles(self, pages_data: List[Dict]) -> Dict:
@@ -1122,7 +1637,9 @@ class SEOAnalyzer:
         for page in pages_data:
             status_code = page.get('status_code', 0)
 
-            if status_code != 200:
+            if page.get('unreachable'):
+                issues.append(f"Pagina non raggiungibile (il server non risponde): {page['url']}")
+            elif status_code != 200:
                 issues.append(
                     f"Codice di stato non valido ({status_code}): {page['url']}"
                 )
@@ -1307,15 +1824,29 @@ class SEOAnalyzer:
                 recommendations.append("Aggiungi riferimenti alle sitemap in robots.txt")
                 score -= 20
 
-            if robots_data['disallow_rules']:
-                critical_rules = [
-                    rule for rule in robots_data['disallow_rules'] if rule['rule'] == '/'
-                ]
-                if critical_rules:
-                    issues.append(
-                        "Trovate regole Disallow critiche che bloccano tutto il sito"
-                    )
-                    score -= 50
+            if robots_data.get('homepage_blocked'):
+                issues.append(
+                    "Trovate regole Disallow critiche che bloccano tutto il sito"
+                )
+                score -= 50
+
+            blocked_urls = robots_data.get('blocked_sitemap_urls', [])
+            for url in blocked_urls[:self.BLOCKED_URLS_LISTED]:
+                issues.append(f"URL presente in sitemap ma bloccato da robots.txt: {url}")
+            if len(blocked_urls) > self.BLOCKED_URLS_LISTED:
+                issues.append(
+                    f"Altri {len(blocked_urls) - self.BLOCKED_URLS_LISTED} URL presenti in "
+                    f"sitemap ma bloccati da robots.txt"
+                )
+            if robots_data.get('blocked_sitemap_sampled'):
+                issues.append(
+                    "Controllo degli URL in sitemap su un campione: tempo dell'analisi esaurito"
+                )
+            if blocked_urls:
+                recommendations.append(
+                    "Rimuovi dalle sitemap gli URL bloccati da robots.txt oppure consentine la scansione"
+                )
+                score -= 15
 
         return {
             'score': max(0, score),
@@ -0,0 +1,149 @@
+import re
+import xml.etree.ElementTree as ET
+import zlib
+from typing import Iterator, List, Optional, Tuple
+
+# blocchi letti dalla risposta HTTP (e porzioni decompresse) nel parsing in streaming
+SITEMAP_CHUNK_SIZE = 64 * 1024
+
+_GZIP_MAGIC = b'\x1f\x8b'
+
+# fallback per XML malformato (es. '&' non escapati negli URL)
+_LOC_RE = re.compile(rb'<loc>(.*?)</loc>')
+_REGEX_TAIL = 8 * 1024  # byte tenuti tra un blocco e l'altro per i <loc> spezzati
+
+
+# (loc, lastmod) di una voce <url>/<sitemap>; lastmod è None se assente
+SitemapLoc = Tuple[str, Optional[str]]
+
+
+def is_nested_sitemap(url: str) -> bool:
+    """<loc> che punta a un'altra sitemap (indice di sitemap), anche compressa"""
+    return url.endswith(('.xml', '.xml.gz')) and 'sitemap' in url.lower()
+
+
+def decompress_prefix(data: bytes) -> bytes:
+    """Primi byte leggibili di un file eventualmente gzip (anche troncato, es. con Range)"""
+    if not data.startswith(_GZIP_MAGIC):
+        return data
+    try:
+        return zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(data)
+    except zlib.error:
+        return b''
+
+
+class SitemapStreamParser:
+    """Parser incrementale di sitemap XML (anche .xml.gz): produce le coppie
+    (loc, lastmod) man mano che arrivano i blocchi, svuotando gli elementi già letti.
+
+    La memoria resta costante con sitemap di qualsiasi dimensione. Se l'XML è
+    malformato prosegue con la regex sui <loc> (i duplicati li scarta il chiamante).
+    """
+
+    def __init__(self):
+        self._parser = ET.XMLPullParser(events=('start', 'end'))
+        self._decompressor = None
+        self._started = False
+        self._failed = False
+        self._root = None
+        self._depth = 0
+        self._locs: List[str] = []  # <loc> della voce in corso
+        self._lastmod: Optional[str] = None
+        self._tail = b''
+
+    def feed(self, chunk: bytes) -> Iterator[SitemapLoc]:
+        if not self._started:
+            self._started = True
+            if chunk.startswith(_GZIP_MAGIC):
+                # .xml.gz servito come file binario: decompressione al volo
+                self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if self._decompressor is None:
+            yield from self._process(chunk)
+            return
+
+        # un blocco gzip può espandersi di decine di volte: porzioni limitate
+        while chunk:
+            try:
+                data = self._decompressor.decompress(chunk, SITEMAP_CHUNK_SIZE)
+            except zlib.error:
+                return
+            chunk = self._decompressor.unconsumed_tail
+            yield from self._process(data)
+
+    def close(self) -> Iterator[SitemapLoc]:
+        if self._decompressor is not None:
+            yield from self._process(self._decompressor.flush())
+        if not self._failed:
+            try:
+                self._parser.close()
+                yield from self._read_events()
+            except ET.ParseError:
+                self._failed = True
+                yield from self._regex_locs(b'', final=True)
+
+    def _process(self, data: bytes) -> List[SitemapLoc]:
+        if self._failed:
+            return self._regex_locs(data)
+        try:
+            self._parser.feed(data)
+        except ET.ParseError:
+            self._failed = True
+        locs = self._read_events()
+        if self._failed:
+            # dal blocco dell'errore in poi valgono i <loc> trovati dalla regex
+            return locs + self._regex_locs(data)
+        # XML valido: per la regex basta tenere la coda, con gli eventuali <loc> spezzati
+        if len(data) >= _REGEX_TAIL:
+            self._tail = data[-_REGEX_TAIL:]
+        else:
+            self._tail = (self._tail + data)[-_REGEX_TAIL:]
+        return locs
+
+    def _read_events(self) -> List[SitemapLoc]:
+        locs = []
+        events = self._parser.read_events()
+        while True:
+            # l'errore di parsing arriva dopo gli eventi validi dello stesso blocco
+            try:
+                event, elem = next(events)
+            except StopIteration:
+                break
+            except ET.ParseError:
+                self._failed = True
+                break
+            if event == 'start':
+                if self._root is None:
+                    self._root = elem
+                self._depth += 1
+                continue
+
+            self._depth -= 1
+            tag = elem.tag
+            text = elem.text.strip() if elem.text else ''
+            if tag.endswith('}loc') or tag == 'loc':
+                if text:
+                    self._locs.append(text)
+            elif tag.endswith('}lastmod') or tag == 'lastmod':
+                self._lastmod = text or None
+
+            if self._depth <= 1:
+                # <url>/<sitemap> completato: i suoi <loc> con il relativo <lastmod>
+                locs.extend((loc, self._lastmod) for loc in self._locs)
+                self._locs = []
+                self._lastmod = None
+                if self._depth == 1 and self._root is not None:
+                    # libera i figli già letti della radice
+                    self._root.clear()
+        return locs
+
+    def _regex_locs(self, data: bytes, final: bool = False) -> List[SitemapLoc]:
+        buffer = self._tail + data
+        locs = []
+        end = 0
+        for match in _LOC_RE.finditer(buffer):
+            url = match.group(1).decode('utf-8', errors='replace')
+            if url and url.startswith('http'):
+                locs.append((url, None))
+            end = match.end()
+        self._tail = b'' if final else buffer[max(end, len(buffer) - _REGEX_TAIL):]
+        return locs
@@ -0,0 +1,129 @@
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+import circuit_breaker
+from circuit_breaker import CircuitBreaker, HostUnreachable
+
+HOST = 'esempio.it'
+
+
+@pytest.fixture(autouse=True)
+def fixed_time(monkeypatch, clock):
+    monkeypatch.setattr(circuit_breaker, 'time', clock)
+    # jitter al massimo: backoff prevedibile
+    monkeypatch.setattr(circuit_breaker, 'random', SimpleNamespace(uniform=lambda low, high: high))
+
+
+def fail(breaker, error=None, attempt=0, method='GET'):
+    return breaker.on_failure(HOST, error or requests.ConnectionError(), attempt, method)
+
+
+@pytest.mark.parametrize('error, method, retry', [
+    (requests.ConnectionError(), 'GET', True),
+    (requests.Timeout(), 'HEAD', True),
+    (requests.ConnectionError(), 'POST', False),
+    # risposte HTTP: il server è raggiungibile
+    (requests.HTTPError(), 'GET', False),
+    (ValueError(), 'GET', False),
+    (HostUnreachable(), 'GET', False),
+])
+def test_retry_decision(error, method, retry):
+    breaker = CircuitBreaker(failure_threshold=10)
+    breaker.before_request(HOST)
+    assert (fail(breaker, error, method=method) is not None) is retry
+
+
+@pytest.mark.parametrize('attempt, backoff', [
+    (0, 0.5),
+    (1, 1.0),
+    (2, 2.0),
+    (3, 4.0),
+    (4, 8.0),
+    (10, 8.0),
+])
+def test_exponential_backoff(attempt, backoff):
+    breaker = CircuitBreaker(failure_threshold=10)
+    assert fail(breaker, attempt=attempt) == backoff
+
+
+def test_backoff_jitter_range(monkeypatch):
+    monkeypatch.setattr(circuit_breaker, 'random', SimpleNamespace(uniform=lambda low, high: low))
+    assert fail(CircuitBreaker(failure_threshold=10), attempt=2) == 1.0
+
+
+def test_opens_after_threshold_and_fails_fast():
+    breaker = CircuitBreaker(failure_threshold=3)
+    for _ in range(2):
+        breaker.before_request(HOST)
+        assert fail(breaker) is not None
+    breaker.before_request(HOST)
+    # terzo errore consecutivo: circuito aperto, nessun altro tentativo
+    assert fail(breaker) is None
+    assert breaker.is_open(HOST)
+    with pytest.raises(HostUnreachable):
+        breaker.before_request(HOST)
+    assert breaker.stats()[HOST]['skipped'] == 1
+    # gli altri host non ne risentono
+    breaker.before_request('altro.it')
+
+
+def test_success_resets_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3)
+    for _ in range(2):
+        fail(breaker)
+    breaker.on_success(HOST)
+    for _ in range(2):
+        fail(breaker)
+    assert not breaker.is_open(HOST)
+
+
+def test_half_open_probe(clock):
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=30)
+    fail(breaker)
+    with pytest.raises(HostUnreachable):
+        breaker.before_request(HOST)
+
+    clock.advance(30)
+    breaker.before_request(HOST)  # richiesta di prova
+    with pytest.raises(HostUnreachable):
+        breaker.before_request(HOST)  # una sola prova alla volta
+    breaker.on_success(HOST)
+    assert not breaker.is_open(HOST)
+    breaker.before_request(HOST)
+
+
+@pytest.mark.parametrize('trips, cooldown', [
+    (1, 30),
+    (2, 60),
+    (3, 120),
+    (5, 300),  # OPEN_COOLDOWN_MAX
+])
+def test_cooldown_doubles_on_each_trip(clock, trips, cooldown):
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=30)
+    fail(breaker)
+    for _ in range(trips - 1):
+        clock.advance(circuit_breaker.OPEN_COOLDOWN_MAX)
+        breaker.before_request(HOST)
+        fail(breaker)  # la prova fallisce: si riapre
+    clock.advance(cooldown - 1)
+    with pytest.raises(HostUnreachable):
+        breaker.before_request(HOST)
+    clock.advance(1)
+    breaker.before_request(HOST)
+
+
+@pytest.mark.parametrize('requests_sent, retries', [
+    (0, 3),
+    (10, 4),
+    (30, 6),
+])
+def test_retry_budget(requests_sent, retries):
+    breaker = CircuitBreaker(failure_threshold=1000)
+    for _ in range(requests_sent):
+        breaker.before_request(HOST)
+    granted = 0
+    while fail(breaker) is not None:
+        granted += 1
+    assert granted == retries
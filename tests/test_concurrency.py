@@ -0,0 +1,109 @@
+import threading
+
+import pytest
+import requests
+
+from concurrency import AdaptiveConcurrency
+
+HOST = 'esempio.it'
+
+
+def request(control, outcome=200, elapsed=0.1, host=HOST):
+    token = control.acquire(host)
+    control.release(host, token, elapsed, outcome)
+
+
+@pytest.mark.parametrize('outcome, limit', [
+    (200, 8),
+    (301, 8),
+    (404, 8),
+    (429, 4),
+    (500, 4),
+    (503, 4),
+    (requests.Timeout(), 4),
+    (requests.ConnectionError(), 4),
+    # errori che non dipendono dal carico del server
+    (requests.exceptions.InvalidURL(), 8),
+    (ValueError(), 8),
+    (None, 8),
+])
+def test_multiplicative_decrease_on_overload(outcome, limit):
+    control = AdaptiveConcurrency(initial=8)
+    request(control, outcome)
+    assert control.limit(HOST) == limit
+
+
+@pytest.mark.parametrize('initial, min_limit, errors, limit', [
+    (8, 1, 1, 4),
+    (8, 1, 2, 2),
+    (8, 1, 5, 1),
+    (8, 3, 5, 3),
+])
+def test_decrease_floor(initial, min_limit, errors, limit):
+    control = AdaptiveConcurrency(initial=initial, min_limit=min_limit)
+    for _ in range(errors):
+        request(control, 503)
+    assert control.limit(HOST) == limit
+
+
+def test_no_cascade_for_requests_started_before_a_decrease():
+    control = AdaptiveConcurrency(initial=8)
+    tokens = [control.acquire(HOST) for _ in range(3)]
+    for token in tokens:
+        control.release(HOST, token, 0.1, 503)
+    assert control.limit(HOST) == 4
+    assert control.stats()['hosts'][HOST]['decreases'] == 1
+
+
+def test_additive_increase_when_saturated_and_latency_flat():
+    control = AdaptiveConcurrency(initial=2, max_limit=3)
+    held = control.acquire(HOST)  # tiene occupato un posto: le altre saturano il limite
+    for _ in range(2):
+        request(control)
+    assert control.limit(HOST) == 3
+    # già al massimo: non cresce oltre
+    for _ in range(10):
+        request(control)
+    control.release(HOST, held, 0.1, 200)
+    assert control.limit(HOST) == 3
+
+
+def test_no_increase_without_saturation():
+    control = AdaptiveConcurrency(initial=2)
+    for _ in range(20):
+        request(control)
+    assert control.limit(HOST) == 2
+
+
+def test_latency_degradation_decreases():
+    control = AdaptiveConcurrency(initial=8)
+    request(control, elapsed=0.1)
+    # EWMA = 0.8 × 0.1 + 0.2 × 1.0 = 0.28, oltre 2.5 × il riferimento
+    request(control, elapsed=1.0)
+    assert control.limit(HOST) == 6
+    decision = control.stats()['decisions'][-1]
+    assert (decision['host'], decision['action'], decision['limit']) == (HOST, 'decrease', 6)
+
+
+def test_hosts_are_independent():
+    control = AdaptiveConcurrency(initial=8)
+    request(control, 503)
+    assert control.limit(HOST) == 4
+    assert control.limit('altro.it') == 8
+
+
+def test_acquire_waits_for_a_free_slot():
+    control = AdaptiveConcurrency(initial=1, max_limit=1)
+    token = control.acquire(HOST)
+    acquired = threading.Event()
+
+    def worker():
+        control.release(HOST, control.acquire(HOST), 0.1, 200)
+        acquired.set()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    assert not acquired.wait(0.1)
+    control.release(HOST, token, 0.1, 200)
+    assert acquired.wait(2)
+    thread.join()
@@ -0,0 +1,74 @@
+import pytest
+
+import politeness
+from politeness import HostScheduler, TokenBucket
+
+
+@pytest.fixture(autouse=True)
+def fixed_time(monkeypatch, clock):
+    monkeypatch.setattr(politeness, 'time', clock)
+
+
+@pytest.mark.parametrize('rate, burst, pauses', [
+    # raffica di `burst` richieste, poi una ogni 1/rate secondi
+    (10, 4, [0, 0, 0, 0, 0.1, 0.2, 0.3]),
+    (0.5, 1, [0, 2, 4, 6]),
+    (2, 2, [0, 0, 0.5, 1.0]),
+])
+def test_token_bucket_reservations(rate, burst, pauses):
+    bucket = TokenBucket(rate, burst)
+    assert [bucket.reserve() for _ in pauses] == pytest.approx(pauses)
+
+
+def test_token_bucket_refills_over_time(clock):
+    bucket = TokenBucket(rate=1, burst=2)
+    assert [bucket.reserve() for _ in range(3)] == [0, 0, 1]
+    clock.advance(5)
+    # torna pieno ma non oltre `burst`
+    assert [bucket.reserve() for _ in range(3)] == [0, 0, 1]
+
+
+def test_token_bucket_cancel_returns_token():
+    bucket = TokenBucket(rate=1, burst=1)
+    bucket.reserve()
+    assert bucket.reserve() == 1
+    bucket.cancel()
+    assert bucket.reserve() == 1
+
+
+@pytest.mark.parametrize('crawl_delay, expected', [
+    (None, 0.1),
+    (0, 0.1),
+    (2, 2),
+    (60, 10),  # ridotto a CRAWL_DELAY_MAX
+])
+def test_crawl_delay(crawl_delay, expected):
+    scheduler = HostScheduler(default_delay=0.1, max_delay=10)
+    scheduler.set_crawl_delay('Esempio.it', crawl_delay)
+    assert scheduler.delay('esempio.it') == expected
+
+
+def test_crawl_delay_spaces_requests_without_burst(clock):
+    scheduler = HostScheduler(default_delay=0.1, burst=4)
+    scheduler.set_crawl_delay('lento.it', 2)
+    assert [scheduler.wait('lento.it') for _ in range(3)] == [0, 2, 2]
+    # l'host senza Crawl-delay ha la sua raffica
+    assert [scheduler.wait('veloce.it') for _ in range(4)] == [0, 0, 0, 0]
+    assert scheduler.stats()['waited_seconds'] == {'lento.it': 4}
+
+
+def test_wait_respects_max_wait(clock):
+    scheduler = HostScheduler()
+    scheduler.set_crawl_delay('lento.it', 5)
+    assert scheduler.wait('lento.it') == 0
+    # turno fra 5 s, oltre il massimo: nessuna attesa e token restituito
+    assert scheduler.wait('lento.it', max_wait=1) is None
+    assert clock.slept == []
+    assert scheduler.wait('lento.it', max_wait=5) == 5
+    assert clock.slept == [5]
+
+
+def test_zero_delay_never_waits(clock):
+    scheduler = HostScheduler(default_delay=0)
+    assert [scheduler.wait('esempio.it') for _ in range(10)] == [0.0] * 10
+    assert clock.slept == []
@@ -0,0 +1,116 @@
+import pytest
+
+from robots_rules import RobotsRules, normalize_path, product_token
+
+ROBOTS = """
+User-agent: Googlebot
+Disallow: /solo-google/
+Crawl-delay: 2
+
+User-agent: *
+Disallow: /privato/
+Allow: /privato/pubblico
+Disallow: /*.pdf$
+Disallow: /*?sort=
+Disallow: /caffè
+Disallow: /~utente
+Disallow:
+Sitemap: https://esempio.it/sitemap.xml
+"""
+
+
+@pytest.mark.parametrize('url, allowed', [
+    ('https://esempio.it/', True),
+    ('https://esempio.it/privato/dati', False),
+    # la regola più lunga vince
+    ('https://esempio.it/privato/pubblico/pagina', True),
+    # '*' e '$'
+    ('https://esempio.it/doc/listino.pdf', False),
+    ('https://esempio.it/doc/listino.pdf?v=2', True),
+    ('https://esempio.it/lista?sort=prezzo', False),
+    ('https://esempio.it/lista?page=2', True),
+    # confronto sui path normalizzati (RFC 9309 §2.2.2)
+    ('https://esempio.it/caff%C3%A8', False),
+    ('https://esempio.it/caff%c3%a8/menu', False),
+    ('https://esempio.it/caffè', False),
+    ('https://esempio.it/%7Eutente', False),
+    ('https://esempio.it/caffe', True),
+    # robots.txt è sempre consentito
+    ('https://esempio.it/robots.txt', True),
+])
+def test_is_allowed_generic_group(url, allowed):
+    assert RobotsRules(ROBOTS).is_allowed(url) is allowed
+
+
+@pytest.mark.parametrize('rules, path, allowed', [
+    # a parità di lunghezza vince Allow
+    ('Disallow: /p\nAllow: /p', '/p', True),
+    ('Allow: /p\nDisallow: /p', '/p', True),
+    ('Disallow: /', '/qualsiasi', False),
+    ('Disallow: /*', '/qualsiasi', False),
+    ('Disallow: /$', '/', False),
+    ('Disallow: /$', '/a', True),
+    ('Disallow: /a*b$', '/a/x/b', False),
+    ('Disallow: /a*b$', '/a/x/bc', True),
+])
+def test_longest_match(rules, path, allowed):
+    robots = RobotsRules(f"User-agent: *\n{rules}\n")
+    assert robots.is_allowed(f"https://esempio.it{path}") is allowed
+
+
+@pytest.mark.parametrize('user_agent, group', [
+    ('Googlebot', 'googlebot'),
+    ('GOOGLEBOT', 'googlebot'),
+    ('Googlebot/2.1 (+http://www.google.com/bot.html)', 'googlebot'),
+    # solo il product token conta: "Googlebot" nel commento non seleziona il gruppo
+    ('Mozilla/5.0 (compatible; Googlebot/2.1)', '*'),
+    ('Googlebot-News', '*'),
+    ('bingbot', '*'),
+    ('*', '*'),
+])
+def test_agent_group(user_agent, group):
+    robots = RobotsRules(ROBOTS)
+    blocked_for_google = not robots.is_allowed('https://esempio.it/solo-google/x', user_agent)
+    assert blocked_for_google is (group == 'googlebot')
+    assert robots.crawl_delay(user_agent) == (2.0 if group == 'googlebot' else None)
+
+
+def test_default_user_agent_and_sitemaps():
+    robots = RobotsRules(ROBOTS, 'Googlebot/2.1')
+    assert not robots.is_allowed('https://esempio.it/solo-google/x')
+    assert robots.sitemaps == ['https://esempio.it/sitemap.xml']
+    assert robots.user_agents == ['googlebot', '*']
+
+
+def test_consecutive_user_agents_share_group():
+    robots = RobotsRules("User-agent: a-bot\nUser-agent: b-bot\nDisallow: /x\n")
+    assert not robots.is_allowed('https://esempio.it/x', 'a-bot')
+    assert not robots.is_allowed('https://esempio.it/x', 'B-Bot/1.0')
+    assert robots.is_allowed('https://esempio.it/x', 'c-bot')
+
+
+def test_empty_robots_allows_everything():
+    assert RobotsRules('').is_allowed('https://esempio.it/qualsiasi')
+
+
+@pytest.mark.parametrize('user_agent, token', [
+    ('Googlebot/2.1 (+http://www.google.com/bot.html)', 'googlebot'),
+    ('  AdsBot-Google  ', 'adsbot-google'),
+    ('*', '*'),
+    ('/2.1', ''),
+])
+def test_product_token(user_agent, token):
+    assert product_token(user_agent) == token
+
+
+@pytest.mark.parametrize('path, normalized', [
+    ('/caffè', '/caff%C3%A8'),
+    ('/caff%c3%a8', '/caff%C3%A8'),
+    ('/%7Eutente', '/~utente'),
+    ('/a%2fb', '/a%2Fb'),
+    ('/con spazio', '/con%20spazio'),
+    ('/*.pdf$', '/*.pdf$'),
+    ('/lista?sort=1&a=b', '/lista?sort=1&a=b'),
+])
+def test_normalize_path(path, normalized):
+    assert normalize_path(path) == normalized
@@ -0,0 +1,83 @@
+import pytest
+
+from url_normalizer import UrlTable, is_tracking_param, normalize_url, url_key, without_query
+
+
+@pytest.mark.parametrize('url, normalized', [
+    ('HTTP://Esempio.IT/Pagina', 'http://esempio.it/Pagina'),
+    ('http://esempio.it:80/a', 'http://esempio.it/a'),
+    ('https://esempio.it:443', 'https://esempio.it/'),
+    ('https://esempio.it:8443/a', 'https://esempio.it:8443/a'),
+    ('http://esempio.it./a', 'http://esempio.it/a'),
+    ('http://esempio.it/a/./b/../c', 'http://esempio.it/a/c'),
+    ('http://esempio.it/a/b/..', 'http://esempio.it/a/'),
+    ('http://esempio.it/%7eutente/%2f', 'http://esempio.it/~utente/%2F'),
+    ('http://esempio.it/caffè', 'http://esempio.it/caff%C3%A8'),
+    ('http://esempio.it/a#sezione', 'http://esempio.it/a'),
+    ('http://esempio.it/a?b=2&a=1', 'http://esempio.it/a?a=1&b=2'),
+    ('http://esempio.it/a?utm_source=x&gclid=y&id=3', 'http://esempio.it/a?id=3'),
+    ('  http://esempio.it/a  ', 'http://esempio.it/a'),
+])
+def test_normalize_url(url, normalized):
+    assert normalize_url(url) == normalized
+
+
+def test_normalize_url_without_query():
+    assert normalize_url('http://esempio.it/a?b=1#x', keep_query=False) == 'http://esempio.it/a'
+
+
+@pytest.mark.parametrize('first, second', [
+    ('http://esempio.it/chi-siamo', 'https://www.esempio.it/chi-siamo/'),
+    ('http://esempio.it', 'http://esempio.it/'),
+    ('http://esempio.it/a?x', 'http://esempio.it/a?x='),
+    ('http://esempio.it/a?b=2&a=1', 'http://esempio.it/a?a=1&b=2&utm_medium=email'),
+    ('http://esempio.it/caffè', 'http://esempio.it/caff%c3%a8'),
+])
+def test_url_key_same_page(first, second):
+    assert url_key(first) == url_key(second)
+
+
+@pytest.mark.parametrize('first, second', [
+    ('http://esempio.it/a', 'http://esempio.it/b'),
+    ('http://esempio.it/a?id=1', 'http://esempio.it/a?id=2'),
+    ('http://esempio.it/A', 'http://esempio.it/a'),
+    ('http://esempio.it/a', 'http://altro.it/a'),
+])
+def test_url_key_different_pages(first, second):
+    assert url_key(first) != url_key(second)
+
+
+@pytest.mark.parametrize('name, tracking', [
+    ('utm_source', True),
+    ('UTM_Campaign', True),
+    ('fbclid', True),
+    ('pk_kwd', True),
+    ('id', False),
+    ('page', False),
+])
+def test_is_tracking_param(name, tracking):
+    assert is_tracking_param(name) is tracking
+
+
+def test_without_query():
+    assert without_query(' http://Esempio.it/a?x=1#f ') == 'http://Esempio.it/a'
+
+
+def test_url_table_keeps_first_original_url():
+    table = UrlTable()
+    first = table.intern('http://Esempio.it/a?x&utm_source=news#top')
+    # stessa pagina in un'altra forma: stesso ID, URL restituito quello visto per primo
+    assert table.intern('http://esempio.it/a/?x=') == first
+    assert table.url(first) == 'http://Esempio.it/a?x&utm_source=news'
+    other = table.intern('http://esempio.it/b')
+    assert other == first + 1
+    assert table.urls([other, first]) == ['http://esempio.it/b', table.url(first)]
+    assert len(table) == 2
+
+
+def test_url_table_lookup():
+    table = UrlTable()
+    assert table.lookup('http://esempio.it/a') is None
+    url_id = table.intern('http://esempio.it/a')
+    assert table.lookup('https://www.esempio.it/a/') == url_id
+    assert len(table) == 1
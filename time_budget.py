@@ -0,0 +1,44 @@
+import os
+import time
+from typing import Optional
+
+# durata massima di un'analisi completa in secondi (0 = nessun limite)
+ANALYSIS_TIME_BUDGET = float(os.environ.get("SEO_TIME_BUDGET", "300"))
+
+# timeout minimo concesso a una richiesta quando il budget sta per finire
+_MIN_REQUEST_TIMEOUT = 0.5
+
+
+class TimeBudgetExceeded(Exception):
+    """Tempo massimo dell'analisi esaurito: la richiesta non viene inviata"""
+
+
+class TimeBudget:
+    """Scadenza unica per tutta l'analisi (sitemap, crawl, scansione pagine).
+
+    Il conto parte alla creazione. Le fasi controllano expired() per fermarsi,
+    le richieste HTTP usano clamp() per non superare la scadenza.
+    """
+
+    def __init__(self, seconds: Optional[float] = ANALYSIS_TIME_BUDGET):
+        self.seconds = seconds if seconds and seconds > 0 else None
+        self.started = time.monotonic()
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def remaining(self) -> float:
+        if self.seconds is None:
+            return float('inf')
+        return self.seconds - self.elapsed()
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def check(self) -> None:
+        if self.expired():
+            raise TimeBudgetExceeded(f"Tempo massimo dell'analisi ({self.seconds:.0f}s) esaurito")
+
+    def clamp(self, timeout: float) -> float:
+        """Timeout della richiesta ridotto al tempo che resta"""
+        return min(timeout, max(self.remaining(), _MIN_REQUEST_TIMEOUT))
@@ -0,0 +1,129 @@
+import re
+import threading
+from functools import lru_cache
+from typing import Dict, List, Optional
+from urllib.parse import parse_qsl, quote, urldefrag, urlencode, urlparse, urlunparse
+
+# parametri di tracciamento: stessa pagina, URL diversi (non cambiano il contenuto)
+TRACKING_PARAMS = frozenset([
+    'gclid', 'gclsrc', 'dclid', 'fbclid', 'msclkid', 'yclid', 'igshid', 'srsltid',
+    'mc_cid', 'mc_eid', '_ga', '_gl', '_hsenc', '_hsmi', 'mkt_tok',
+])
+TRACKING_PREFIXES = ('utm_', 'pk_', 'mtm_')
+
+_DEFAULT_PORTS = {'http': ':80', 'https': ':443'}
+_PERCENT_RE = re.compile(r'%[0-9a-fA-F]{2}')
+_UNRESERVED = frozenset('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~')
+# caratteri lasciati così come sono nel path (RFC 3986), il resto viene codificato
+_PATH_SAFE = "/%:@!$&'()*+,;=-._~"
+
+# URL normalizzati tenuti in cache (gli stessi link compaiono su molte pagine)
+NORMALIZE_CACHE_SIZE = 65536
+
+
+def _normalize_escape(match) -> str:
+    # %7E → ~ (carattere non riservato), %2f → %2F
+    char = chr(int(match.group(0)[1:], 16))
+    return char if char in _UNRESERVED else match.group(0).upper()
+
+
+def _normalize_path(path: str) -> str:
+    path = _PERCENT_RE.sub(_normalize_escape, quote(path, safe=_PATH_SAFE))
+    if '.' not in path:
+        return path or '/'
+    # segmenti '.' e '..' risolti come farebbe il browser
+    segments: List[str] = []
+    for segment in path.split('/')[1:]:
+        if segment == '..':
+            if segments:
+                segments.pop()
+        elif segment != '.':
+            segments.append(segment)
+    trailing = path.endswith(('/.', '/..'))
+    return '/' + '/'.join(segments) + ('/' if trailing and segments else '')
+
+
+def is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize_url(url: str, keep_query: bool = True) -> str:
+    """URL canonico da scaricare: schema e host minuscoli, senza porta di default,
+    path con escape normalizzati e senza '.'/'..', path vuoto → '/', niente
+    frammento, query senza parametri di tracciamento e ordinata (oppure rimossa
+    del tutto con keep_query=False)"""
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    netloc = parsed.netloc.lower().rstrip('.')
+    default_port = _DEFAULT_PORTS.get(scheme)
+    if default_port and netloc.endswith(default_port):
+        netloc = netloc[:-len(default_port)]
+
+    query = ''
+    if keep_query and parsed.query:
+        params = [(name, value) for name, value in parse_qsl(parsed.query, keep_blank_values=True)
+                  if not is_tracking_param(name)]
+        query = urlencode(sorted(params))
+    return urlunparse((scheme, netloc, _normalize_path(parsed.path), parsed.params, query, ''))
+
+
+def without_query(url: str) -> str:
+    """URL così come è stato trovato, senza query e frammento"""
+    return urlunparse(urlparse(url.strip())._replace(query='', fragment=''))
+
+
+def site_key(netloc: str) -> str:
+    """Host senza 'www.': www.esempio.it ed esempio.it sono lo stesso sito"""
+    netloc = netloc.lower()
+    return netloc[4:] if netloc.startswith('www.') else netloc
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def url_key(url: str) -> str:
+    """Identità di una pagina per la deduplica: URL normalizzato senza 'www.',
+    senza schema e senza '/' finale (/chi-siamo e /chi-siamo/ sono la stessa pagina)"""
+    parsed = urlparse(normalize_url(url))
+    path = parsed.path.rstrip('/') or '/'
+    query = f"?{parsed.query}" if parsed.query else ''
+    return f"{site_key(parsed.netloc)}{path}{query}"
+
+
+class UrlTable:
+    """Tabella di interning degli URL di un'analisi: ogni pagina (per url_key) riceve
+    un ID intero piccolo e stabile per tutta l'analisi.
+
+    Deduplica, mappe per pagina e grafi di link lavorano sugli ID; url(id)
+    restituisce il primo URL visto così com'era (senza frammento), quello da
+    scaricare e da riportare: la forma normalizzata serve solo come chiave.
+    """
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._urls: List[str] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._urls)
+
+    def intern(self, url: str) -> int:
+        key = url_key(url)
+        url_id = self._ids.get(key)
+        if url_id is None:
+            with self._lock:
+                url_id = self._ids.get(key)
+                if url_id is None:
+                    url_id = self._ids[key] = len(self._urls)
+                    self._urls.append(urldefrag(url.strip())[0])
+        return url_id
+
+    def lookup(self, url: str) -> Optional[int]:
+        """ID dell'URL se già visto, senza aggiungerlo"""
+        return self._ids.get(url_key(url))
+
+    def url(self, url_id: int) -> str:
+        return self._urls[url_id]
+
+    def urls(self, url_ids) -> List[str]:
+        return [self._urls[url_id] for url_id in url_ids]
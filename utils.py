@@ -1,7 +1,9 @@
 import validators
+from functools import lru_cache
 from urllib.parse import urlparse, urlunparse
 import re
 
+@lru_cache(maxsize=4096)
 def validate_url(url: str) -> tuple[bool, str]:
     """
     Valida un URL e restituisce (is_valid, clean_url)
@@ -33,6 +35,7 @@ def validate_url(url: str) -> tuple[bool, str]:
     
     return True, clean_url
 
+@lru_cache(maxsize=4096)
 def extract_domain(url: str) -> str:
     """
     Estrae il dominio da un URL